@@ -7,6 +7,33 @@ import time
 
 logger = logging.getLogger("drone-client")
 
+# Execution providers in order of preference (fastest first).
+# Only the ones reported by ort.get_available_providers() are used.
+PREFERRED_EXECUTION_PROVIDERS = [
+    "TensorrtExecutionProvider",
+    "CUDAExecutionProvider",
+    "CoreMLExecutionProvider",
+    "NnapiExecutionProvider",
+    "CPUExecutionProvider",
+]
+
+# Per-provider tuning for the YOLOv8 model.
+# TensorRT: FP16 trades a little precision for throughput, engine cache avoids rebuilding on every start.
+TRT_ENGINE_CACHE_PATH = "./trt_cache"
+PROVIDER_OPTIONS = {
+    "TensorrtExecutionProvider": {
+        "trt_fp16_enable": True,
+        "trt_engine_cache_enable": True,
+        "trt_engine_cache_path": TRT_ENGINE_CACHE_PATH,
+    },
+    "CUDAExecutionProvider": {
+        "device_id": 0,
+        "arena_extend_strategy": "kNextPowerOfTwo",
+        "cudnn_conv_algo_search": "HEURISTIC",
+        "do_copy_in_default_stream": True,
+    },
+}
+
 
 # =====================================================================
 #                          CameraManager
@@ -14,7 +41,7 @@ logger = logging.getLogger("drone-client")
 
 class CameraManager:
     """Optimized for Raspberry Pi Camera Module 3.
-       Auto-detects Picamera2 → fallback to OpenCV.
+       Auto-detects Picamera2 → ffmpegcv (decode/convert in an ffmpeg process) → OpenCV.
     """
 
     def __init__(self, width=1280, height=720, fps=30, device=0):
@@ -23,8 +50,10 @@ class CameraManager:
         self.fps = fps
         self.device = device
 
-        self._lock = threading.Lock()
+        # Single-slot latest frame. The capture thread only ever rebinds this attribute to a
+        # fresh array (atomic under the GIL), so readers need no lock.
         self._frame = None
+        self._frame_listeners = []  # callables invoked (from the capture thread) on each new frame
         self._running = False
         self._thread = None
 
@@ -38,8 +67,10 @@ class CameraManager:
             # ----------------------------------------------------------
             # BEST CONFIGURATION FOR CAMERA MODULE 3
             # ----------------------------------------------------------
+            # libcamera "RGB888" is laid out [B, G, R] in memory, i.e. exactly OpenCV BGR,
+            # so frames need no per-frame color conversion downstream
             config = self.picam2.create_video_configuration(
-                main={"size": (self.width, self.height), "format": "XBGR8888"},
+                main={"size": (self.width, self.height), "format": "RGB888"},
                 buffer_count=4,
             )
             self.picam2.configure(config)
@@ -77,10 +108,12 @@ class CameraManager:
         self._running = True
 
         if not self._use_picamera2:
-            self._cap = cv2.VideoCapture(self.device)
-            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-            self._cap.set(cv2.CAP_PROP_FPS, self.fps)
+            self._cap = self._open_ffmpegcv()
+            if self._cap is None:
+                self._cap = cv2.VideoCapture(self.device)
+                self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+                self._cap.set(cv2.CAP_PROP_FPS, self.fps)
 
         else:
             self.picam2.start()
@@ -88,8 +121,33 @@ class CameraManager:
         self._thread = threading.Thread(target=self._capture_loop, daemon=True)
         self._thread.start()
 
+    # -----------------------------------------------------------------
+    def _open_ffmpegcv(self):
+        """USB/V4L2 cameras: let ffmpeg (hardware-accelerated where available) decode and
+        convert to BGR in its own process instead of libv4l + swscale on the capture thread."""
+        try:
+            import ffmpegcv
+        except ImportError:
+            return None
+        try:
+            camname = f"/dev/video{self.device}" if isinstance(self.device, int) else self.device
+            cap = ffmpegcv.VideoCaptureCAM(
+                camname,
+                pix_fmt="bgr24",
+                camsize_wh=(self.width, self.height),
+                camfps=self.fps,
+            )
+            self._backend = "ffmpegcv"
+            logger.info(f"[ffmpegcv] Capturing {camname} {self.width}x{self.height}@{self.fps}")
+            return cap
+        except Exception as e:
+            logger.warning(f"ffmpegcv capture unavailable ({e}) → Using OpenCV VideoCapture")
+            return None
+
     # -----------------------------------------------------------------
     def _capture_loop(self):
+        # Reads block until the driver delivers the next frame, so they pace the loop on
+        # their own; only back off when the camera fails
         delay = 1.0 / max(1, self.fps)
 
         while self._running:
@@ -104,19 +162,35 @@ class CameraManager:
                     if not ret:
                         frame = None
 
-                if frame is not None:
-                    with self._lock:
-                        self._frame = frame
+                if frame is None:
+                    time.sleep(delay)
+                    continue
+
+                # Single slot: overwrite, so readers always get the newest frame
+                self._frame = frame
+                for listener in self._frame_listeners:
+                    try:
+                        listener()
+                    except Exception as e:
+                        logger.debug(f"Frame listener error: {e}")
 
             except Exception as e:
                 logger.error(f"Camera read error: {e}")
-
-            time.sleep(delay)
+                time.sleep(delay)
 
     # -----------------------------------------------------------------
     def get_frame(self):
-        with self._lock:
-            return None if self._frame is None else self._frame.copy()
+        # Copy because callers draw on the frame and the same frame may be read more than once
+        frame = self._frame
+        return None if frame is None else frame.copy()
+
+    # -----------------------------------------------------------------
+    def add_frame_listener(self, callback):
+        """Register a callback fired from the capture thread whenever a new frame is stored"""
+        self._frame_listeners = self._frame_listeners + [callback]
+
+    def remove_frame_listener(self, callback):
+        self._frame_listeners = [cb for cb in self._frame_listeners if cb is not callback]
 
     # -----------------------------------------------------------------
     def stop(self):
@@ -157,15 +231,29 @@ async def setup_camera(width, height, fps):
     return cam
 
 
+def select_execution_providers():
+    """Return the best available ORT providers (with options) in preference order"""
+    available = ort.get_available_providers()
+    providers = [p for p in PREFERRED_EXECUTION_PROVIDERS if p in available]
+    if "CPUExecutionProvider" not in providers:
+        providers.append("CPUExecutionProvider")
+    return [(p, PROVIDER_OPTIONS[p]) if p in PROVIDER_OPTIONS else p for p in providers]
+
+
 async def load_onnx_model(model_path):
     try:
         import os
         if not os.path.exists(model_path):
             logger.error(f"❌ ONNX model file not found: {model_path}")
             return None
-            
-        session = ort.InferenceSession(model_path)
-        
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = select_execution_providers()
+        if "TensorrtExecutionProvider" in ort.get_available_providers():
+            os.makedirs(TRT_ENGINE_CACHE_PATH, exist_ok=True)
+        session = ort.InferenceSession(model_path, sess_options=opts, providers=providers)
+
         # Log model details
         input_name = session.get_inputs()[0].name
         input_shape = session.get_inputs()[0].shape
@@ -175,8 +263,31 @@ async def load_onnx_model(model_path):
         logger.info(f"   Input: {input_name} {input_shape}")
         logger.info(f"   Outputs: {output_names}")
         logger.info(f"   Model type: YOLO (2 classes: earth_person, sea_person)")
+        logger.info(f"   Execution providers: {session.get_providers()}")
+        if session.get_providers()[0] == "CPUExecutionProvider" and len(providers) > 1:
+            logger.warning("⚠️ Accelerated execution providers are available but the session fell back to CPU")
         
         return session
     except Exception as e:
         logger.error(f"❌ Failed to load ONNX model: {e}", exc_info=True)
         return None
+
+
+async def load_trt_engine(model_path, engine_path=None):
+    """Load (or build and cache) a TensorRT FP16 engine for the ONNX model.
+    Returns None if TensorRT/PyCUDA are unavailable so the caller can fall back to ORT.
+    """
+    try:
+        from trt_backend import TRTEngineBackend
+
+        backend = TRTEngineBackend(model_path, engine_path=engine_path, fp16=True)
+        logger.info(f"✅ TensorRT engine ready for {model_path}")
+        logger.info(f"   Input: {backend.get_inputs()[0].name} {backend.get_inputs()[0].shape}")
+        logger.info(f"   Outputs: {[out.name for out in backend.get_outputs()]}")
+        return backend
+    except ImportError as e:
+        logger.warning(f"TensorRT not available ({e}), falling back to ONNX Runtime")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Failed to load TensorRT engine: {e}", exc_info=True)
+        return None
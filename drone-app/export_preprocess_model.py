@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Bake the YOLO preprocessing into the ONNX graph.
+
+The exported model takes the raw camera frame as uint8 NHWC [1, H, W, 3] (BGR, any size)
+and runs Transpose -> Resize(640x640) -> Cast -> Mul(1/255) inside ONNX Runtime before the
+original network. ObjectDetectionStreamTrack detects the uint8 input and feeds frames as-is,
+so no resize/normalize/transpose passes run in Python and the EP can fuse them.
+
+Usage:
+    python export_preprocess_model.py --model nano_model_fp32.onnx --output nano_model_fp32_raw.onnx
+    python main.py --model nano_model_fp32_raw.onnx
+"""
+
+import argparse
+import logging
+import os
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("drone-client")
+
+RAW_INPUT_NAME = "frame"
+
+
+def add_preprocess(model):
+    graph = model.graph
+    model_input = graph.input[0]
+    dims = model_input.type.tensor_type.shape.dim
+    _, channels, in_h, in_w = [d.dim_value for d in dims]
+    prefix = "preprocess_"
+
+    raw_input = helper.make_tensor_value_info(RAW_INPUT_NAME, TensorProto.UINT8, [1, "height", "width", channels])
+    sizes = numpy_helper.from_array(np.array([1, channels, in_h, in_w], dtype=np.int64), prefix + "sizes")
+    scale = numpy_helper.from_array(np.array(1.0 / 255.0, dtype=np.float32), prefix + "scale")
+    # Opset 11-12 Resize requires roi/scales inputs; empty tensors mean "use sizes"
+    empty = numpy_helper.from_array(np.array([], dtype=np.float32), prefix + "empty")
+
+    nodes = [
+        helper.make_node("Transpose", [RAW_INPUT_NAME], [prefix + "nchw"], perm=[0, 3, 1, 2], name=prefix + "transpose"),
+        # Same sampling as cv2.resize INTER_LINEAR (half-pixel centers); resizing before the
+        # cast keeps the float work at model resolution
+        helper.make_node(
+            "Resize", [prefix + "nchw", prefix + "empty", prefix + "empty", prefix + "sizes"], [prefix + "resized"],
+            mode="linear", coordinate_transformation_mode="half_pixel", name=prefix + "resize",
+        ),
+        helper.make_node("Cast", [prefix + "resized"], [prefix + "float"], to=TensorProto.FLOAT, name=prefix + "cast"),
+        helper.make_node("Mul", [prefix + "float", prefix + "scale"], [model_input.name], name=prefix + "normalize"),
+    ]
+
+    graph.initializer.extend([sizes, scale, empty])
+    for node in reversed(nodes):
+        graph.node.insert(0, node)
+    graph.input.remove(model_input)
+    graph.input.insert(0, raw_input)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO ONNX model with uint8 NHWC preprocessing baked in")
+    parser.add_argument("--model", default="nano_model_fp32.onnx", help="Original ONNX model ([1,3,640,640] float input)")
+    parser.add_argument("--output", default=None, help="Output path (default: <model>_raw.onnx)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.model)[0] + "_raw.onnx"
+    model = add_preprocess(onnx.load(args.model))
+    onnx.checker.check_model(model)
+    onnx.save(model, output)
+    logger.info(f"✅ Model with baked-in preprocessing written to {output} (input '{RAW_INPUT_NAME}': uint8 [1,H,W,3])")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Hardware H.264 encoding for the outgoing WebRTC video.
+
+aiortc encodes video in software (libvpx VP8 or libx264). On the Pi (V4L2 M2M) and Jetson
+(NVENC) a hardware H.264 encoder is available through FFmpeg/PyAV. HardwareH264Encoder reuses
+aiortc's H264Encoder packetization and only swaps the codec it opens, falling back to libx264
+if the hardware codec fails to encode.
+"""
+
+import fractions
+import logging
+
+import av
+import aiortc.rtcrtpsender as rtcrtpsender
+from aiortc import RTCRtpSender
+from aiortc.codecs.h264 import H264Encoder, MAX_FRAME_RATE
+
+logger = logging.getLogger("drone-client")
+
+# Preferred hardware encoders (first available wins) and their FFmpeg options
+HW_H264_ENCODERS = {
+    "h264_nvenc": {"preset": "p4", "tune": "ll", "rc": "vbr", "cq": "23"},
+    "h264_v4l2m2m": {},
+}
+
+_hw_codec_name = None
+
+
+class HardwareH264Encoder(H264Encoder):
+    """aiortc H264Encoder that opens a hardware codec instead of libx264"""
+
+    def __init__(self, codec_name):
+        super().__init__()
+        self._hw_codec_name = codec_name
+
+    def _create_hw_codec(self, frame):
+        codec = av.CodecContext.create(self._hw_codec_name, "w")
+        codec.width = frame.width
+        codec.height = frame.height
+        codec.bit_rate = self.target_bitrate
+        codec.pix_fmt = "yuv420p"
+        codec.framerate = fractions.Fraction(MAX_FRAME_RATE, 1)
+        codec.time_base = fractions.Fraction(1, MAX_FRAME_RATE)
+        codec.options = dict(HW_H264_ENCODERS.get(self._hw_codec_name, {}))
+        try:
+            codec.profile = "Baseline"
+        except Exception:
+            pass
+        return codec
+
+    def _encode_frame(self, frame, force_keyframe):
+        if self._hw_codec_name is not None:
+            # Same reset rule as H264Encoder (size change or >10% bitrate change)
+            if self.codec and (
+                frame.width != self.codec.width
+                or frame.height != self.codec.height
+                or abs(self.target_bitrate - self.codec.bit_rate) / self.codec.bit_rate > 0.1
+            ):
+                self.buffer_data = b""
+                self.buffer_pts = None
+                self.codec = None
+            if self.codec is None:
+                self.codec = self._create_hw_codec(frame)
+
+        try:
+            packages = list(super()._encode_frame(frame, force_keyframe))
+        except Exception as e:
+            if self._hw_codec_name is None:
+                raise
+            logger.warning(f"Hardware H.264 encoder {self._hw_codec_name} failed ({e}), falling back to libx264")
+            self._hw_codec_name = None
+            self.codec = None
+            packages = list(super()._encode_frame(frame, force_keyframe))
+        yield from packages
+
+
+def enable_hardware_h264():
+    """Route aiortc's H.264 encoding through the first available hardware encoder.
+    Returns the encoder name, or None if no hardware H.264 encoder is available."""
+    global _hw_codec_name
+    if _hw_codec_name is not None:
+        return _hw_codec_name
+
+    available = av.codecs_available
+    codec_name = next((name for name in HW_H264_ENCODERS if name in available), None)
+    if codec_name is None:
+        logger.info("No hardware H.264 encoder available, using aiortc software encoders")
+        return None
+
+    original_get_encoder = rtcrtpsender.get_encoder
+
+    def get_encoder(codec):
+        if codec.mimeType.lower() == "video/h264":
+            return HardwareH264Encoder(codec_name)
+        return original_get_encoder(codec)
+
+    rtcrtpsender.get_encoder = get_encoder
+    _hw_codec_name = codec_name
+    logger.info(f"🎞️ Hardware H.264 encoder enabled: {codec_name}")
+    return codec_name
+
+
+def prefer_h264(peer_connection, sender):
+    """Put H.264 (and its RTX) first in the offer so the browser negotiates the hardware path"""
+    transceiver = next((t for t in peer_connection.getTransceivers() if t.sender == sender), None)
+    if transceiver is None:
+        return
+    codecs = RTCRtpSender.getCapabilities("video").codecs
+    h264 = [c for c in codecs if c.mimeType.lower() == "video/h264"]
+    rtx = [c for c in codecs if c.mimeType.lower() == "video/rtx"]
+    others = [c for c in codecs if c not in h264 and c not in rtx]
+    transceiver.setCodecPreferences(h264 + rtx + others)
@@ -32,13 +32,22 @@ from aiortc import (
 )
 from aiortc.contrib.media import MediaPlayer, MediaRelay
 from av import VideoFrame
-from camera_utils import setup_camera, load_onnx_model
+from camera_utils import setup_camera, load_onnx_model, load_trt_engine
 from gps_utils import read_gps, gps_task
 from video_stream import ObjectDetectionStreamTrack
+from nms_numba import NUMBA_AVAILABLE, nms_kernel
+from hw_encoder import enable_hardware_h264, prefer_h264
 import io
 import cloudinary
 import cloudinary.uploader
 
+# uvloop (optional): faster event loop for aiortc's RTP/DTLS/SCTP and Socket.IO tasks
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 CLOUD_NAME= dotenv.get_key("CLOUD_NAME")
 CLOUD_API_KEY= dotenv.get_key("CLOUD_API_KEY")
 CLOUD_API_SECRET= dotenv.get_key("CLOUD_API_SECRET")
@@ -65,6 +74,7 @@ DEFAULT_BITRATE = 3000000  # Video bitrate in bits/s (4Mbps default, 3-6Mbps rec
                            # Higher = better quality but more bandwidth
 DEFAULT_DETECTION_FRAME_INTERVAL = 3  # AI detection runs every N frames (3 = ~10x/sec at 30fps)
                                         # Higher = less CPU usage but slower detection updates
+DEFAULT_HARDWARE_H264 = True  # Use V4L2 M2M / NVENC H.264 encoder when available (falls back to software)
 DEFAULT_DETECTION_PUBLISH_INTERVAL = 0.5  # seconds between detection publishes to server (faster updates)
 
 # DUAL THRESHOLD STRATEGY (Config 7A: tested and optimized)
@@ -214,6 +224,14 @@ async def create_peer_connection():
             sender = peer_connection.addTrack(video_track)
             logger.info("Added video track to peer connection")
 
+            # Offer H.264 first when a hardware encoder can produce it
+            if DEFAULT_HARDWARE_H264 and enable_hardware_h264():
+                try:
+                    prefer_h264(peer_connection, sender)
+                    logger.info("Preferring H.264 (hardware encoder) for video track")
+                except Exception as e:
+                    logger.warning(f"Could not set H.264 codec preference: {e}")
+
             # Configure RTP encoding using configurable parameters
             try:
                 params = sender.getParameters()
@@ -429,31 +447,38 @@ async def restart_webrtc():
 
 
 def _nms_boxes(boxes, scores, iou_threshold=0.5):
-    """Simple NMS for boxes in [x1,y1,x2,y2] format."""
-    if len(boxes) == 0:
+    """Simple NMS for boxes in [x1,y1,x2,y2] format.
+
+    Accepts lists or NumPy arrays ((N,4) boxes, (N,) scores) and returns kept indices.
+    Uses the compiled kernel from nms_numba when numba is installed; otherwise IoU of the
+    pivot box against all remaining boxes is computed in one broadcast step.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32)
+    scores = np.asarray(scores, dtype=np.float32)
+    if boxes.shape[0] == 0:
         return []
-    boxes = np.array(boxes)
-    scores = np.array(scores)
+    if NUMBA_AVAILABLE:
+        return nms_kernel(boxes, scores, np.float32(iou_threshold)).tolist()
     x1 = boxes[:, 0]
     y1 = boxes[:, 1]
     x2 = boxes[:, 2]
     y2 = boxes[:, 3]
     areas = (x2 - x1 + 1) * (y2 - y1 + 1)
-    order = scores.argsort()[::-1]
+    order = scores.argsort(kind='mergesort')[::-1]
     keep = []
     while order.size > 0:
         i = order[0]
-        keep.append(i)
-        xx1 = np.maximum(x1[i], x1[order[1:]])
-        yy1 = np.maximum(y1[i], y1[order[1:]])
-        xx2 = np.minimum(x2[i], x2[order[1:]])
-        yy2 = np.minimum(y2[i], y2[order[1:]])
+        keep.append(int(i))
+        rest = order[1:]
+        xx1 = np.maximum(x1[i], x1[rest])
+        yy1 = np.maximum(y1[i], y1[rest])
+        xx2 = np.minimum(x2[i], x2[rest])
+        yy2 = np.minimum(y2[i], y2[rest])
         w = np.maximum(0.0, xx2 - xx1 + 1)
         h = np.maximum(0.0, yy2 - yy1 + 1)
         inter = w * h
-        ovr = inter / (areas[i] + areas[order[1:]] - inter)
-        inds = np.where(ovr <= iou_threshold)[0]
-        order = order[inds + 1]
+        ovr = inter / (areas[i] + areas[rest] - inter)
+        order = rest[ovr <= iou_threshold]
     return keep
 
 
@@ -473,59 +498,44 @@ def parse_onnx_detections(outputs, input_size=(640, 640), orig_size=None, conf_t
         if isinstance(out, np.ndarray):
             logger.debug(f"   Output[{i}] shape: {out.shape}, dtype: {out.dtype}")
     
-    dets = []
+    boxes = None    # (N, 4) float32 [x1, y1, x2, y2] in input_size coordinates
+    scores = None   # (N,) float32
+    classes = None  # (N,) int
     
-    # YOLOv8 format: [1, 6, 8400] -> transpose to [8400, 6]
+    # YOLOv8 format: [1, 6, 8400] - rows are x, y, w, h, conf_class0, conf_class1
     if len(outputs) > 0:
         out = outputs[0]
-        if isinstance(out, np.ndarray) and out.ndim == 3 and out.shape[0] == 1:
-            # Shape: [1, 6, 8400] -> transpose to [8400, 6]
-            out = out[0].T  # Now shape is [8400, 6]
-            logger.debug(f"   Transposed to shape: {out.shape}")
+        if isinstance(out, np.ndarray) and out.ndim == 3 and out.shape[0] == 1 and out.shape[1] == 6:
+            # Work on the native (6, 8400) layout: each row slice is a contiguous view, no transpose
+            pred = out[0]
             
-            # Parse each detection
-            for detection in out:
-                x, y, w, h = detection[0], detection[1], detection[2], detection[3]
-                conf_class0 = detection[4]  # earth_person
-                conf_class1 = detection[5]  # sea_person
-                
-                # Use separate thresholds if provided, otherwise use general threshold
-                thresh_c0 = earth_threshold if earth_threshold is not None else conf_threshold
-                thresh_c1 = sea_threshold if sea_threshold is not None else conf_threshold
-                
-                # Check both classes with their respective thresholds
-                detected = False
-                cls = None
-                conf = 0.0
-                
-                if conf_class0 >= thresh_c0 and conf_class0 > conf_class1:
-                    cls = 0
-                    conf = conf_class0
-                    detected = True
-                elif conf_class1 >= thresh_c1 and conf_class1 >= conf_class0:
-                    cls = 1
-                    conf = conf_class1
-                    detected = True
-                
-                if not detected:
-                    continue
-                
-                # Convert center format (x,y,w,h) to corner format (x1,y1,x2,y2)
-                x1 = x - w / 2.0
-                y1 = y - h / 2.0
-                x2 = x + w / 2.0
-                y2 = y + h / 2.0
-                
-                dets.append({
-                    'bbox': [float(x1), float(y1), float(x2), float(y2)],
-                    'score': float(conf),
-                    'class': int(cls)
-                })
+            # Use separate thresholds if provided, otherwise use general threshold
+            thresh_c0 = earth_threshold if earth_threshold is not None else conf_threshold
+            thresh_c1 = sea_threshold if sea_threshold is not None else conf_threshold
+            
+            # Vectorized class selection over all anchors at once:
+            # earth_person (0) wins only if strictly greater, sea_person (1) wins ties
+            conf_class0 = pred[4]  # earth_person
+            conf_class1 = pred[5]  # sea_person
+            is_sea = conf_class1 >= conf_class0
+            confidences = np.where(is_sea, conf_class1, conf_class0)
+            mask = confidences >= np.where(is_sea, thresh_c1, thresh_c0)
             
-            logger.debug(f"   Found {len(dets)} detections before NMS")
+            # Convert center format (x,y,w,h) to corner format (x1,y1,x2,y2) for surviving anchors only
+            cx, cy, w, h = pred[0, mask], pred[1, mask], pred[2, mask], pred[3, mask]
+            boxes = np.empty((cx.shape[0], 4), dtype=np.float32)
+            boxes[:, 0] = cx - w / 2.0
+            boxes[:, 1] = cy - h / 2.0
+            boxes[:, 2] = cx + w / 2.0
+            boxes[:, 3] = cy + h / 2.0
+            scores = confidences[mask].astype(np.float32)
+            classes = is_sea[mask].astype(np.int64)
+            
+            logger.debug(f"   Found {len(boxes)} detections before NMS")
     
-    # Old fallback parser (keep for compatibility)
-    if not dets:
+    # Old fallback parser (keep for compatibility) - only for non-YOLOv8 output layouts
+    if boxes is None:
+        dets = []
         for out in outputs:
             if not isinstance(out, np.ndarray):
                 continue
@@ -602,24 +612,26 @@ def parse_onnx_detections(outputs, input_size=(640, 640), orig_size=None, conf_t
                     y2 = cy + h / 2.0
                     dets.append({'bbox': [float(x1), float(y1), float(x2), float(y2)], 'score': float(score), 'class': int(cls)})
 
-    if orig_size is not None and dets:
+        if dets:
+            boxes = np.array([d['bbox'] for d in dets], dtype=np.float32)
+            scores = np.array([d['score'] for d in dets], dtype=np.float32)
+            classes = np.array([d['class'] for d in dets], dtype=np.int64)
+
+    if boxes is None or len(boxes) == 0:
+        return []
+
+    if orig_size is not None:
         iw, ih = input_size
         ow, oh = orig_size
-        sx = ow / float(iw)
-        sy = oh / float(ih)
-        for d in dets:
-            x1, y1, x2, y2 = d['bbox']
-            d['bbox'] = [x1 * sx, y1 * sy, x2 * sx, y2 * sy]
-
-    final = []
-    if dets:
-        boxes = [d['bbox'] for d in dets]
-        scores = [d['score'] for d in dets]
-        keep_idxs = _nms_boxes(boxes, scores, iou_threshold=iou_threshold)
-        for i in keep_idxs:
-            final.append(dets[i])
+        boxes[:, 0::2] *= ow / float(iw)
+        boxes[:, 1::2] *= oh / float(ih)
 
-    return final
+    # Dicts are only built for the boxes that survive NMS
+    keep_idxs = _nms_boxes(boxes, scores, iou_threshold=iou_threshold)
+    return [
+        {'bbox': boxes[i].tolist(), 'score': float(scores[i]), 'class': int(classes[i])}
+        for i in keep_idxs
+    ]
 
 
 async def detection_publisher_loop(sio_client, webcam, ort_session, video_track_ref=None, interval=DEFAULT_DETECTION_PUBLISH_INTERVAL):
@@ -1194,8 +1206,10 @@ async def main():
     parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="Video width")
     parser.add_argument("--height", type=int, default=DEFAULT_HEIGHT, help="Video height")
     parser.add_argument("--fps", type=int, default=DEFAULT_FPS, help="Video FPS")
-    parser.add_argument("--model", default="nano_model_fp32.onnx", help="Path to ONNX model (use FP32, INT8 has zero confidence issue)")
+    parser.add_argument("--model", default="nano_model_fp32.onnx", help="Path to ONNX model (use FP32 or a statically quantized INT8 model from quantize_model.py; the bundled dynamic INT8 model has zero confidence issue)")
     parser.add_argument("--no-detection", action="store_true", help="Disable object detection")
+    parser.add_argument("--tensorrt", action="store_true", help="Run detection on a TensorRT FP16 engine built from --model (Jetson/CUDA)")
+    parser.add_argument("--trt-engine", default=None, help="Path of the cached TensorRT engine (default: <model>_fp16.engine)")
 
     args = parser.parse_args()
     
@@ -1207,8 +1221,12 @@ async def main():
     
     # Load ONNX model if detection is enabled
     if not args.no_detection:
-        logger.info(f"Loading ONNX model from {args.model}")
-        ort_session = await load_onnx_model(args.model)
+        if args.tensorrt:
+            logger.info(f"Loading TensorRT engine for {args.model}")
+            ort_session = await load_trt_engine(args.model, args.trt_engine)
+        if not ort_session:
+            logger.info(f"Loading ONNX model from {args.model}")
+            ort_session = await load_onnx_model(args.model)
         if not ort_session:
             logger.warning("Failed to load ONNX model, object detection will be disabled")
     else:
@@ -1276,10 +1294,15 @@ async def main():
         await cleanup()
         logger.info("Shutdown complete")
 
-nest_asyncio.apply()
-
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
+    if UVLOOP_AVAILABLE:
+        # nest_asyncio cannot patch uvloop loops (and nothing here re-enters a running loop)
+        loop = uvloop.new_event_loop()
+        asyncio.set_event_loop(loop)
+        logger.info("⚡ Using uvloop event loop")
+    else:
+        nest_asyncio.apply()
+        loop = asyncio.get_event_loop()
     try:
         loop.run_until_complete(main())
     except KeyboardInterrupt:
@@ -0,0 +1,107 @@
+import logging
+import os
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger("drone-client")
+
+
+# Minimal stand-in for onnxruntime.NodeArg so callers can keep using get_inputs()[0].name
+TensorInfo = namedtuple("TensorInfo", ["name", "shape"])
+
+
+class TRTEngineBackend:
+    """TensorRT FP16 engine exposing the subset of the ORT InferenceSession API used by the drone app.
+
+    The engine is built once from the ONNX model and cached on disk. Host (pinned) and
+    device buffers are allocated up front, so run() only does H2D copy, execute, D2H copy.
+    Requires the optional `tensorrt` and `pycuda` packages (Jetson / CUDA targets only).
+    """
+
+    def __init__(self, onnx_path, engine_path=None, fp16=True):
+        import tensorrt as trt
+        import pycuda.driver as cuda
+        import pycuda.autoinit  # noqa: F401 - creates the CUDA context
+
+        self._cuda = cuda
+        self._trt_logger = trt.Logger(trt.Logger.WARNING)
+        engine_path = engine_path or os.path.splitext(onnx_path)[0] + ("_fp16.engine" if fp16 else ".engine")
+
+        if os.path.exists(engine_path):
+            logger.info(f"Loading cached TensorRT engine: {engine_path}")
+            with open(engine_path, "rb") as f:
+                serialized = f.read()
+        else:
+            logger.info(f"Building TensorRT engine from {onnx_path} (fp16={fp16}), this can take a few minutes...")
+            serialized = self._build_engine(trt, onnx_path, fp16)
+            with open(engine_path, "wb") as f:
+                f.write(serialized)
+            logger.info(f"TensorRT engine saved: {engine_path}")
+
+        runtime = trt.Runtime(self._trt_logger)
+        self.engine = runtime.deserialize_cuda_engine(serialized)
+        self.context = self.engine.create_execution_context()
+        self.stream = cuda.Stream()
+
+        # Allocate pinned host + device buffers once for every binding
+        self._inputs = []
+        self._outputs = []
+        self._bindings = []
+        for i in range(self.engine.num_bindings):
+            name = self.engine.get_binding_name(i)
+            shape = tuple(self.engine.get_binding_shape(i))
+            dtype = trt.nptype(self.engine.get_binding_dtype(i))
+            host = cuda.pagelocked_empty(shape, dtype)
+            device = cuda.mem_alloc(host.nbytes)
+            self._bindings.append(int(device))
+            entry = (TensorInfo(name, list(shape)), host, device)
+            if self.engine.binding_is_input(i):
+                self._inputs.append(entry)
+            else:
+                self._outputs.append(entry)
+
+    def _build_engine(self, trt, onnx_path, fp16):
+        builder = trt.Builder(self._trt_logger)
+        network = builder.create_network(1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH))
+        parser = trt.OnnxParser(network, self._trt_logger)
+        with open(onnx_path, "rb") as f:
+            if not parser.parse(f.read()):
+                errors = [str(parser.get_error(i)) for i in range(parser.num_errors)]
+                raise RuntimeError(f"Failed to parse ONNX model: {errors}")
+
+        config = builder.create_builder_config()
+        config.set_memory_pool_limit(trt.MemoryPoolType.WORKSPACE, 1 << 30)
+        if fp16 and builder.platform_has_fast_fp16:
+            config.set_flag(trt.BuilderFlag.FP16)
+        serialized = builder.build_serialized_network(network, config)
+        if serialized is None:
+            raise RuntimeError("TensorRT engine build failed")
+        return bytes(serialized)
+
+    def get_inputs(self):
+        return [info for info, _, _ in self._inputs]
+
+    def get_outputs(self):
+        return [info for info, _, _ in self._outputs]
+
+    def get_providers(self):
+        return ["TensorRT"]
+
+    def run(self, output_names, input_feed):
+        """Same call signature as ort.InferenceSession.run; returns a list of output arrays"""
+        cuda = self._cuda
+        for info, host, device in self._inputs:
+            np.copyto(host, input_feed[info.name], casting="unsafe")
+            cuda.memcpy_htod_async(device, host, self.stream)
+
+        self.context.execute_async_v2(bindings=self._bindings, stream_handle=self.stream.handle)
+
+        for _, host, device in self._outputs:
+            cuda.memcpy_dtoh_async(host, device, self.stream)
+        self.stream.synchronize()
+
+        outputs = [(info.name, host.copy()) for info, host, _ in self._outputs]
+        if output_names:
+            return [arr for name, arr in outputs if name in output_names]
+        return [arr for _, arr in outputs]
@@ -17,6 +17,9 @@ logger = logging.getLogger("drone-client")
 # Video stream will call camera.get_frame() to retrieve the latest frame.
 
 
+# YOLO model input resolution (width, height)
+MODEL_INPUT_SIZE = (640, 640)
+
 # Class names and colors for bounding boxes
 CLASS_NAMES = {0: 'earth_person', 1: 'sea_person'}
 CLASS_COLORS = {0: (0, 255, 0), 1: (0, 165, 255)}  # Green for earth_person, Orange for sea_person
@@ -35,20 +38,90 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
         self.width = width
         self.height = height
         self.counter = 0
-        self.last_frame_time = time.time()
+        # Monotonic (loop.time()) pacing origin: frame N is due at _pace_start + N / fps
+        self._pace_start = None
         self.ort_session = ort_session
         self.running = True
         self.active = True
         self.cached_detections = []
+        self._label_sprites = {}  # (class, score*100) -> pre-rendered label image
+
+        # Set (via call_soon_threadsafe) by the camera capture thread when a new frame is stored.
+        # Created lazily in recv() so it binds to the running event loop.
+        self._frame_ready = None
+        self._frame_listener = None
+
+        # Frame format is validated on the first frame and re-checked only when the shape changes
+        self._frame_shape_validated = False
+        self._frame_shape = None
+        self._color_conversion = None
+        self._camera_error_logged = False
         
         # OPTIMIZED: Run AI detection less frequently to reduce CPU load and prevent video lag
         # Can be configured from main.py (default: every 15 frames = ~0.5s at 30fps)
         self.detection_update_interval = detection_interval
         
         # Background detection thread
+        # cached_detections is only ever rebound to a new list by the worker (never mutated),
+        # so recv() reads it without locking; detection_lock is kept for external readers
         self.detection_lock = threading.Lock()
-        self.detection_queue = []  # Queue of frames to process
+        # Single-slot handoff: the newest frame replaces any frame the worker hasn't picked up yet
+        self._pending_frame = None
+        self._frame_event = threading.Event()
         self.detection_thread = None
+
+        # Built once: shown (read-only) whenever the camera has no frame or conversion fails
+        self._error_frame = np.zeros((self.height, self.width, 3), np.uint8)
+        cv2.putText(
+            self._error_frame,
+            "Camera Error",
+            (self.width // 4, self.height // 2),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1,
+            (255, 255, 255),
+            2
+        )
+        self._blank_frame = np.zeros((self.height, self.width, 3), np.uint8)
+
+        # Reusable output frames in the encoders' native yuv420p: recv() converts BGR->I420 with
+        # OpenCV (SIMD) straight into a buffer a VideoFrame wraps zero-copy, so PyAV never runs
+        # swscale and nothing is allocated or copied per call. Two slots alternate so the frame
+        # handed to the encoder is never the one being overwritten.
+        self._yuv_ring = []
+        self._yuv_index = 0
+        if self.width % 2 == 0 and self.height % 2 == 0:
+            for _ in range(2):
+                yuv_buf = np.empty((self.height * 3 // 2, self.width), dtype=np.uint8)
+                self._yuv_ring.append((yuv_buf, *self._wrap_yuv_buffer(yuv_buf)))
+
+        # Preprocessing buffers, allocated once and reused by every detect_objects() call
+        # (only the detection worker thread touches them)
+        self._input_size = MODEL_INPUT_SIZE
+        self._input_name = None
+        self._resize_buf = None
+        self._input_buf = None
+        # Models exported by export_preprocess_model.py take the raw uint8 NHWC frame and
+        # resize/normalize inside the graph, so no Python preprocessing is needed
+        self._raw_input = False
+        if self.ort_session is not None:
+            model_input = self.ort_session.get_inputs()[0]
+            self._input_name = model_input.name
+            self._raw_input = getattr(model_input, 'type', '') == 'tensor(uint8)'
+        if self.ort_session is not None and not self._raw_input:
+            input_dtype = np.float16 if getattr(model_input, 'type', '') == 'tensor(float16)' else np.float32
+            in_w, in_h = self._input_size
+            self._resize_buf = np.empty((in_h, in_w, 3), dtype=np.uint8)
+            self._input_buf = np.empty((1, 3, in_h, in_w), dtype=input_dtype)
+
+        # When ORT runs on CUDA and OpenCV has CUDA support, preprocess on the GPU and hand
+        # ORT the device pointer: only the raw uint8 frame crosses PCIe
+        self._io_binding = None
+        self._ort_input = None
+        self._gpu_preprocess = False
+        if self._input_buf is not None:
+            self._gpu_preprocess = self._init_gpu_preprocess()
+            if not self._gpu_preprocess:
+                self._io_binding = self._init_io_binding()
         
         # Start background detection thread if AI is enabled
         if self.ort_session is not None:
@@ -68,6 +141,55 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
                 if self.counter % 30 == 0:  # Log errors occasionally
                     logger.error(f"Camera capture error: {e}")
    
+    async def _wait_for_new_frame(self, frame_interval):
+        """Event-driven wait for the capture thread; returns immediately if a frame is already pending"""
+        if not hasattr(self.camera, 'add_frame_listener'):
+            return
+        if self._frame_ready is None:
+            loop = asyncio.get_running_loop()
+            self._frame_ready = asyncio.Event()
+            self._frame_listener = lambda: loop.call_soon_threadsafe(self._frame_ready.set)
+            self.camera.add_frame_listener(self._frame_listener)
+        try:
+            # Timeout keeps the stream alive (repeat / error frame) if the camera stalls
+            await asyncio.wait_for(self._frame_ready.wait(), timeout=max(0.1, 2 * frame_interval))
+        except asyncio.TimeoutError:
+            pass
+        self._frame_ready.clear()
+
+    def _wrap_yuv_buffer(self, yuv_buf):
+        """Return (VideoFrame, plane copies) for an I420 buffer. The frame shares yuv_buf's memory
+        when PyAV supports it; otherwise it is a separate frame and the planes must be copied."""
+        try:
+            return VideoFrame.from_numpy_buffer(yuv_buf, format="yuv420p"), []
+        except (AttributeError, ValueError) as e:
+            logger.debug(f"Zero-copy yuv420p frame unavailable ({e}), copying planes instead")
+        video_frame = VideoFrame(width=self.width, height=self.height, format="yuv420p")
+        h, w, qh = self.height, self.width, self.height // 4
+        src_planes = [
+            yuv_buf[:h],
+            yuv_buf[h:h + qh].reshape(h // 2, w // 2),
+            yuv_buf[h + qh:].reshape(h // 2, w // 2),
+        ]
+        plane_views = [
+            np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)[:src.shape[0], :src.shape[1]]
+            for plane, src in zip(video_frame.planes, src_planes)
+        ]
+        return video_frame, list(zip(plane_views, src_planes))
+
+    def _validate_frame_format(self, frame):
+        """Inspect frame layout once and record the conversion needed to get 3-channel BGR"""
+        self._frame_shape = frame.shape
+        self._color_conversion = None
+        if frame.ndim == 2:
+            # grayscale -> BGR
+            self._color_conversion = cv2.COLOR_GRAY2BGR
+        elif frame.ndim == 3 and frame.shape[2] == 4:
+            # 4-channel image (e.g., RGBA/BGRA) -> BGR
+            self._color_conversion = cv2.COLOR_RGBA2BGR
+        self._frame_shape_validated = True
+        logger.info(f"📐 Camera frame format: shape={frame.shape}, conversion={self._color_conversion}")
+   
     def is_active(self):
         """Check if the track is active"""
         return self.active
@@ -75,15 +197,21 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
     def _detection_worker(self):
         """Background thread that processes AI detection without blocking video stream"""
         logger.info("🤖 AI detection worker thread started (YOLO model: earth_person, sea_person)")
+        try:
+            from nms_numba import warmup_nms
+            warmup_nms()
+        except Exception as e:
+            logger.warning(f"NMS warm-up failed: {e}")
         frame_count = 0
         last_log_time = time.time()
         while self.running:
             try:
-                # Check if there's a frame to process
-                frame_to_process = None
-                with self.detection_lock:
-                    if self.detection_queue:
-                        frame_to_process = self.detection_queue.pop(0)
+                # Wait for recv() to hand over a frame (timeout lets us notice stop())
+                if not self._frame_event.wait(timeout=0.1):
+                    continue
+                self._frame_event.clear()
+                frame_to_process = self._pending_frame
+                self._pending_frame = None
                 
                 if frame_to_process is not None:
                     frame_count += 1
@@ -94,17 +222,13 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
                     
                     inference_time = (time.time() - start_time) * 1000  # ms
                     
-                    # Update cached detections
-                    with self.detection_lock:
-                        self.cached_detections = detections
+                    # Publish latest result (atomic rebind)
+                    self.cached_detections = detections
                     
                     # Log every 5 seconds
                     if time.time() - last_log_time > 5.0:
                         logger.info(f"⚡ Detection worker: {frame_count} frames processed, last inference: {inference_time:.1f}ms")
                         last_log_time = time.time()
-                else:
-                    # No frame to process, sleep briefly (reduced from 0.05 to 0.02 for faster response)
-                    time.sleep(0.02)
                     
             except Exception as e:
                 logger.error(f"Detection worker error: {e}", exc_info=True)
@@ -116,6 +240,10 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
         """Stop the track and release resources"""
         self.running = False
         self.active = False
+        self._frame_event.set()
+        if self._frame_listener is not None and hasattr(self.camera, 'remove_frame_listener'):
+            self.camera.remove_frame_listener(self._frame_listener)
+            self._frame_listener = None
         
         # Wait for detection thread to finish
         if hasattr(self, 'detection_thread') and self.detection_thread and self.detection_thread.is_alive():
@@ -128,16 +256,19 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
     async def recv(self):
         self.counter += 1
 
-        # Log every 30 frames to check if video is streaming
-        if self.counter % 30 == 0:
-            logger.info(f"🎬 VideoStreamTrack.recv() called #{self.counter} times")
-
-        # Limit frame rate
-        now = time.time()
-        elapsed = now - self.last_frame_time
-        target_elapsed = 1.0 / self.fps
-        if elapsed < target_elapsed:
-            await asyncio.sleep(target_elapsed - elapsed)
+        # Pace against a monotonic deadline, then wait until the camera actually has a new frame
+        frame_interval = 1.0 / self.fps
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._pace_start is None:
+            self._pace_start = now - self.counter * frame_interval
+        delay = self._pace_start + self.counter * frame_interval - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif delay < -frame_interval:
+            # Running late: re-anchor instead of bursting frames to catch up
+            self._pace_start = now - self.counter * frame_interval
+        await self._wait_for_new_frame(frame_interval)
        
         # Get the latest frame from the shared camera manager
         try:
@@ -145,10 +276,13 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
             frame = None
             if hasattr(self.camera, 'get_frame'):
                 frame = self.camera.get_frame()
-                if frame is None:
+                # Log outage start/end only: recv() runs at frame rate
+                if frame is None and not self._camera_error_logged:
                     logger.warning("⚠️ Camera returned None frame")
-                else:
-                    logger.debug(f"📸 Got frame from camera: shape={frame.shape}")
+                    self._camera_error_logged = True
+                elif frame is not None and self._camera_error_logged:
+                    logger.info("📸 Camera frames available again")
+                    self._camera_error_logged = False
             else:
                 # Fallback to legacy API (capture_array)
                 frame = self.camera.capture_array()
@@ -161,49 +295,33 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
             logger.error(f"Error getting frame from camera: {e}")
             frame = None
        
-        # If no frame is available, create a blank one
+        # If no frame is available, show the prebuilt error frame
         if frame is None:
-            frame = np.zeros((self.height, self.width, 3), np.uint8)
-            cv2.putText(
-                frame,
-                "Camera Error",
-                (self.width // 4, self.height // 2),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (255, 255, 255),
-                2
-            )
+            frame = self._error_frame
         else:
-            # Defensive normalization: ensure frame has 3 channels in BGR order
+            # Defensive normalization: ensure frame has 3 channels in BGR order.
+            # The conversion is resolved once per frame shape and then reused.
             try:
-                if isinstance(frame, np.ndarray):
-                    if frame.ndim == 2:
-                        # grayscale -> BGR
-                        frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
-                    elif frame.ndim == 3 and frame.shape[2] == 4:
-                        # 4-channel image (e.g., RGBA/BGRA) -> try to convert to BGR
-                        try:
-                            frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-                        except Exception:
-                            try:
-                                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                            except Exception:
-                                # Fallback: drop alpha
-                                frame = frame[:, :, :3]
+                if not self._frame_shape_validated or frame.shape != self._frame_shape:
+                    self._validate_frame_format(frame)
+                if self._color_conversion is not None:
+                    frame = cv2.cvtColor(frame, self._color_conversion)
             except Exception as e:
+                self._frame_shape_validated = False
+                if isinstance(frame, np.ndarray) and frame.ndim == 3 and frame.shape[2] == 4:
+                    # Fallback: drop alpha
+                    frame = frame[:, :, :3]
                 logger.debug(f"Frame normalization error: {e}")
             
             # OPTIMIZED: Queue frame for background AI processing (non-blocking)
             # Only queue if AI is enabled and it's time for detection update
             if self.ort_session is not None and self.counter % self.detection_update_interval == 0:
-                with self.detection_lock:
-                    # Keep queue small (max 3 frames) to handle burst processing
-                    if len(self.detection_queue) < 3:
-                        self.detection_queue.append(frame.copy())
+                # Latest frame wins: stale frames are never processed
+                self._pending_frame = frame.copy()
+                self._frame_event.set()
             
             # Draw bounding boxes on every frame using cached detections
-            with self.detection_lock:
-                detections_to_draw = self.cached_detections.copy() if self.cached_detections else []
+            detections_to_draw = self.cached_detections
             
             if detections_to_draw:
                 frame = self.draw_bboxes(frame, detections_to_draw)
@@ -214,21 +332,114 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
         try:
             if not (isinstance(frame, np.ndarray) and frame.ndim == 3 and frame.shape[2] == 3):
                 # As a last resort, convert or create a blank frame
-                frame = cv2.resize(np.zeros((self.height, self.width, 3), np.uint8), (self.width, self.height))
-            video_frame = VideoFrame.from_ndarray(frame, format="bgr24")
+                frame = self._blank_frame
+            if self._yuv_ring and frame.shape == (self.height, self.width, 3) and frame.dtype == np.uint8:
+                # Convert once to I420 directly into the frame's backing buffer
+                yuv_buf, video_frame, plane_copies = self._yuv_ring[self._yuv_index]
+                self._yuv_index ^= 1
+                cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=yuv_buf)
+                for dst, src in plane_copies:
+                    np.copyto(dst, src)
+            else:
+                video_frame = VideoFrame.from_ndarray(frame, format="bgr24")
         except Exception as e:
             logger.error(f"Failed to convert ndarray to VideoFrame: {e}")
             # Fallback to a blank frame
-            fallback = np.zeros((self.height, self.width, 3), np.uint8)
-            video_frame = VideoFrame.from_ndarray(fallback, format="bgr24")
+            video_frame = VideoFrame.from_ndarray(self._blank_frame, format="bgr24")
         video_frame.pts = self.counter
         video_frame.time_base = Fraction(1, self.fps)
-        self.last_frame_time = time.time()
 
 
         return video_frame
 
 
+    def _init_gpu_preprocess(self):
+        """Allocate GPU scratch buffers + IOBinding; returns False if CUDA preprocessing is unavailable"""
+        try:
+            if self.ort_session is None or not hasattr(self.ort_session, 'io_binding'):
+                return False
+            if 'CUDAExecutionProvider' not in self.ort_session.get_providers():
+                return False
+            if self._input_buf.dtype != np.float32 or cv2.cuda.getCudaEnabledDeviceCount() == 0:
+                return False
+
+            in_w, in_h = self._input_size
+            self._gpu_src = cv2.cuda_GpuMat()
+            self._gpu_resized = cv2.cuda_GpuMat(in_h, in_w, cv2.CV_8UC3)
+            self._gpu_scaled = cv2.cuda_GpuMat(in_h, in_w, cv2.CV_32FC3)
+            # One contiguous (3*H, W) float plane stack == NCHW tensor; each channel is an ROI view into it
+            self._gpu_nchw = cv2.cuda_GpuMat(3 * in_h, in_w, cv2.CV_32FC1)
+            if not self._gpu_nchw.isContinuous():
+                return False
+            self._gpu_planes = [cv2.cuda_GpuMat(self._gpu_nchw, (0, c * in_h, in_w, in_h)) for c in range(3)]
+
+            self._io_binding = self.ort_session.io_binding()
+            self._io_binding.bind_input(
+                self._input_name, 'cuda', 0, np.float32, [1, 3, in_h, in_w], self._gpu_nchw.cudaPtr()
+            )
+            for out in self.ort_session.get_outputs():
+                self._io_binding.bind_output(out.name, 'cpu')
+            # One real inference so a broken GPU path falls back to CPU preprocessing here
+            # instead of every detect_objects() call failing
+            self._run_gpu(np.zeros((in_h, in_w, 3), dtype=np.uint8))
+            logger.info("🚀 Using CUDA preprocessing with ORT IOBinding (zero host->device input copy)")
+            return True
+        except Exception as e:
+            logger.info(f"CUDA preprocessing unavailable, using CPU preprocessing: {e}")
+            self._io_binding = None
+            return False
+
+    def _init_io_binding(self):
+        """Bind the preallocated input tensor once so each run does no input allocation"""
+        try:
+            if self.ort_session is None or not hasattr(self.ort_session, 'io_binding'):
+                return None
+            binding = self.ort_session.io_binding()
+            providers = self.ort_session.get_providers()
+            if 'CUDAExecutionProvider' in providers or 'TensorrtExecutionProvider' in providers:
+                # Device-resident input, refreshed in place from the host buffer every run
+                self._ort_input = ort.OrtValue.ortvalue_from_numpy(self._input_buf, 'cuda', 0)
+            else:
+                # A CPU OrtValue shares memory with the NumPy buffer, so _preprocess() writes straight into it
+                self._ort_input = ort.OrtValue.ortvalue_from_numpy(self._input_buf)
+            binding.bind_ortvalue_input(self._input_name, self._ort_input)
+            for out in self.ort_session.get_outputs():
+                binding.bind_output(out.name, 'cpu')
+            return binding
+        except Exception as e:
+            logger.info(f"IOBinding unavailable, using plain session.run: {e}")
+            self._ort_input = None
+            return None
+
+    def _run_bound(self, frame):
+        """CPU preprocessing into the bound input tensor, then run without re-binding"""
+        self._preprocess(frame)
+        if self._ort_input.device_name() != 'cpu':
+            self._ort_input.update_inplace(self._input_buf)
+        self.ort_session.run_with_iobinding(self._io_binding)
+        return self._io_binding.copy_outputs_to_cpu()
+
+    def _run_gpu(self, frame):
+        """Upload raw frame, resize/scale/split to NCHW on the GPU and run ORT on the bound device buffer"""
+        self._gpu_src.upload(frame)
+        cv2.cuda.resize(self._gpu_src, self._input_size, self._gpu_resized)
+        self._gpu_resized.convertTo(cv2.CV_32FC3, self._gpu_scaled, 1.0 / 255.0)
+        cv2.cuda.split(self._gpu_scaled, self._gpu_planes)
+        self.ort_session.run_with_iobinding(self._io_binding)
+        return self._io_binding.copy_outputs_to_cpu()
+
+    def _preprocess(self, frame):
+        """Resize + scale to [0,1] + HWC->NCHW in a single pass into the preallocated input tensor"""
+        cv2.resize(frame, self._input_size, dst=self._resize_buf)
+        np.multiply(
+            self._resize_buf.transpose(2, 0, 1),
+            1.0 / 255.0,
+            out=self._input_buf[0],
+            dtype=self._input_buf.dtype,
+            casting='unsafe',
+        )
+        return self._input_buf
+
     def detect_objects(self, frame):
         """
         Perform object detection on the frame using ONNX model
@@ -239,20 +450,22 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
             return []
 
         try:
-            input_size = (640, 640)
-            input_frame = cv2.resize(frame, input_size)
-            input_frame = input_frame.astype(np.float32) / 255.0
-            input_frame = np.transpose(input_frame, (2, 0, 1))
-            input_frame = np.expand_dims(input_frame, axis=0)
-
-            outputs = self.ort_session.run(None, {self.ort_session.get_inputs()[0].name: input_frame})
+            if self._raw_input:
+                outputs = self.ort_session.run(None, {self._input_name: frame[np.newaxis]})
+            elif self._gpu_preprocess:
+                outputs = self._run_gpu(frame)
+            elif self._io_binding is not None:
+                outputs = self._run_bound(frame)
+            else:
+                input_frame = self._preprocess(frame)
+                outputs = self.ort_session.run(None, {self._input_name: input_frame})
             
             # Parse detections using helper from main.py with dual thresholds and NMS
             h, w = frame.shape[:2]
             from main import parse_onnx_detections, DEFAULT_EARTH_PERSON_THRESHOLD, DEFAULT_SEA_PERSON_THRESHOLD, DEFAULT_NMS_IOU_THRESHOLD
             detections = parse_onnx_detections(
                 outputs, 
-                input_size=(640, 640), 
+                input_size=self._input_size, 
                 orig_size=(w, h),
                 iou_threshold=DEFAULT_NMS_IOU_THRESHOLD,
                 earth_threshold=DEFAULT_EARTH_PERSON_THRESHOLD,
@@ -273,10 +486,27 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
             logger.error(f"Object detection error: {e}", exc_info=True)
             return []
 
+    def _get_label_sprite(self, cls, score_bucket):
+        """Render a label (background + text) once per (class, score at 2 decimals) and cache it"""
+        key = (cls, score_bucket)
+        sprite = self._label_sprites.get(key)
+        if sprite is None:
+            color = CLASS_COLORS.get(cls, (255, 255, 255))
+            label = CLASS_NAMES.get(cls, f'class_{cls}')
+            label_text = f"{label}: {score_bucket / 100:.2f}"
+            (tw, th), _ = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            # Same geometry as the filled rectangle (x1, y1-th-4)..(x1+tw, y1) drawn previously
+            sprite = np.empty((th + 5, tw + 1, 3), dtype=np.uint8)
+            sprite[:] = color
+            cv2.putText(sprite, label_text, (0, th + 2), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            self._label_sprites[key] = sprite
+        return sprite
+
     def draw_bboxes(self, frame, detections):
         """
         Draw bounding boxes on frame for detected objects
         """
+        fh, fw = frame.shape[:2]
         for det in detections:
             bbox = det['bbox']
             cls = det.get('class', 0)
@@ -284,17 +514,17 @@ class ObjectDetectionStreamTrack(VideoStreamTrack):
             
             x1, y1, x2, y2 = map(int, bbox)
             color = CLASS_COLORS.get(cls, (255, 255, 255))
-            label = CLASS_NAMES.get(cls, f'class_{cls}')
             
             # Draw rectangle
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
             
-            # Draw label background
-            label_text = f"{label}: {score:.2f}"
-            (tw, th), _ = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-            cv2.rectangle(frame, (x1, y1 - th - 4), (x1 + tw, y1), color, -1)
-            
-            # Draw label text
-            cv2.putText(frame, label_text, (x1, y1 - 2), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            # Blit cached label sprite, clipped to the frame
+            sprite = self._get_label_sprite(cls, int(round(score * 100)))
+            sh, sw = sprite.shape[:2]
+            top = y1 - sh + 1
+            fy0, fy1 = max(top, 0), min(top + sh, fh)
+            fx0, fx1 = max(x1, 0), min(x1 + sw, fw)
+            if fy0 < fy1 and fx0 < fx1:
+                frame[fy0:fy1, fx0:fx1] = sprite[fy0 - top:fy1 - top, fx0 - x1:fx1 - x1]
         
         return frame
@@ -7,34 +7,70 @@ Copyright (c) 2025 HuyHoang04
 Licensed under MIT License - see LICENSE file for details
 """
 
+import io
 import json
+import logging
+import logging.handlers
 import RPi.GPIO as GPIO
 import os
 import subprocess
-from time import sleep
 import time
 import signal
+import socket
 import sys
 import atexit
 import fcntl
 import cloudinary
 import cloudinary.uploader
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import socketio
 import threading
+import queue
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 load_dotenv()
 
+# Logging: callers only enqueue records; a listener thread does the stdout/journald writes
+log_handler = logging.StreamHandler(sys.stdout)
+log_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
+logger = logging.getLogger("record-system")
+log_listener.start()
+# Registered first so it runs last at exit, after cleanup has logged
+atexit.register(log_listener.stop)
+
+# PyAV (optional): record + encode in-process instead of spawning ffmpeg for every recording
+try:
+    import av
+    import numpy as np
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
 
 # ----------------- CẤU HÌNH -----------------
 BUTTON_PIN = 17
+BUTTON_BOUNCE_MS = 200  # edge filter in the GPIO driver; no software dead time after a recording
 RECORD_SECONDS = 15
 SAMPLE_RATE = 48000
 VOLUME_GAIN = 3.5
+MP3_BITRATE = 64000  # mono speech; Whisper resamples to 16 kHz anyway
+VOLUME_GAIN_Q8 = int(round(VOLUME_GAIN * 256))  # PyAV path: fixed-point gain, integer math only
 
 HELP_SOUND = "/home/pi/Documents/Drone2025/music/Help_me.wav"
+HELP_SAMPLE_NAME = "help_me"  # PulseAudio sample-cache entry for HELP_SOUND
+PROMPT_TAIL_SECONDS = 0.2  # audio-output latency after play-sample; mic audio is dropped until then
 SAVE_DIR = "/home/pi/Documents/Drone2025/mic_help"
 COUNTER_FILE = os.path.join(SAVE_DIR, "counter.txt")
+# Recordings/URLs whose upload or Web App POST failed; retried at startup and after each success
+PENDING_FILE = os.path.join(SAVE_DIR, "pending.jsonl")
+PENDING_RETRY_INTERVAL = 300  # seconds between retries when nothing new succeeds
 PULSE_SERVER = "/run/user/1000/pulse/native"
 MIC_DEVICE = "plughw:2,0"
 
@@ -51,24 +87,51 @@ cloudinary.config(
 )
 CLOUD_FOLDER = "help"
 
+# Background uploads: recordings waiting for/under upload are capped so a dead network
+# cannot pile up work; beyond the cap process_recording uploads inline (old behavior)
+UPLOAD_WORKERS = 2
+MAX_PENDING_UPLOADS = 8
+UPLOAD_RETRIES = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
 WEB_APP_URL = os.getenv("WEB_APP_URL")
 if not WEB_APP_URL:
     WEB_APP_URL = "http://localhost:5000/api/voice/records"
-    print(f"[CONFIG]  WEB_APP_URL not set in environment, using default: {WEB_APP_URL}")
-    print("[CONFIG] Set WEB_APP_URL environment variable to configure the production endpoint")
+    logger.warning(f"[CONFIG]  WEB_APP_URL not set in environment, using default: {WEB_APP_URL}")
+    logger.info("[CONFIG] Set WEB_APP_URL environment variable to configure the production endpoint")
 else:
-    print(f"[CONFIG] Using Web App URL: {WEB_APP_URL}")
+    logger.info(f"[CONFIG] Using Web App URL: {WEB_APP_URL}")
 
 # Validate URL format
 if not WEB_APP_URL.startswith(("http://", "https://")):
     raise ValueError(f"[CONFIG] Invalid WEB_APP_URL: '{WEB_APP_URL}' - Must start with http:// or https://")
 
+# Reused keep-alive connection to the Web App (saves a TCP/TLS handshake per recording).
+# Only connection errors and gateway errors (502/503/504) are retried, with exponential
+# backoff: the POST is not idempotent, so a read timeout or a 500 (the record may already
+# be committed) must not re-send it.
+http_retry = Retry(
+    total=UPLOAD_RETRIES,
+    connect=UPLOAD_RETRIES,
+    read=0,
+    backoff_factor=RETRY_BACKOFF,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"POST"}),
+    raise_on_status=False,
+)
+http_session = requests.Session()
+http_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS, max_retries=http_retry))
+http_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS, max_retries=http_retry))
+
 DEVICE_ID = os.environ.get("DEVICE_ID", "rescue_mic_01")  # Device identifier (configurable)
-print(f"[CONFIG] Device ID: {DEVICE_ID}")
+logger.info(f"[CONFIG] Device ID: {DEVICE_ID}")
+
+# Constant part of every Web App record; send_to_web_app only adds the audio URL
+BASE_PAYLOAD = {"device_id": DEVICE_ID, "duration": RECORD_SECONDS}
 
 # Web App Socket.IO URL
 WEB_APP_SOCKET_URL = "https://kanisha-unannexable-laraine.ngrok-free.dev/"
-print(f"[CONFIG] Web App Socket URL: {WEB_APP_SOCKET_URL}")
+logger.info(f"[CONFIG] Web App Socket URL: {WEB_APP_SOCKET_URL}")
 
 os.makedirs(SAVE_DIR, exist_ok=True)
 
@@ -78,22 +141,31 @@ GPIO.setup(BUTTON_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
 # Socket.IO client
 sio = socketio.Client()
 
-# Global flag for web trigger
-web_trigger_flag = False
-web_trigger_lock = threading.Lock()
+# Upload + Web App notification run here so the next recording can start immediately
+upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+upload_slots = threading.BoundedSemaphore(MAX_PENDING_UPLOADS)
+
+# Failed-upload queue (PENDING_FILE): appended by upload workers, rewritten by the retry thread
+pending_lock = threading.Lock()
+pending_event = threading.Event()
+
+# Pending trigger ("button" / "web"): at most one waits while a recording runs, extras are dropped.
+# The main loop blocks on it instead of polling.
+trigger_queue = queue.Queue(maxsize=1)
+recording_active = threading.Event()
 
 def cleanup_resources():
     """Clean up GPIO and other resources before exit"""
-    print("\n[CLEANUP] Cleaning up resources...")
+    logger.info("[CLEANUP] Cleaning up resources...")
     try:
         GPIO.cleanup()
-        print("[CLEANUP] GPIO cleaned up successfully")
+        logger.info("[CLEANUP] GPIO cleaned up successfully")
     except Exception as e:
-        print(f"[CLEANUP] Error cleaning GPIO: {e}")
+        logger.error(f"[CLEANUP] Error cleaning GPIO: {e}")
 
 def signal_handler(signum, frame):
     """Handle SIGINT (Ctrl+C) and SIGTERM signals"""
-    print(f"\n[SIGNAL] Received signal {signum}, shutting down gracefully...")
+    logger.info(f"[SIGNAL] Received signal {signum}, shutting down gracefully...")
     cleanup_resources()
     sys.exit(0)
 
@@ -101,270 +173,479 @@ def signal_handler(signum, frame):
 signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
 signal.signal(signal.SIGTERM, signal_handler)  # kill command
 atexit.register(cleanup_resources)
-print("[SYSTEM] Initialized. Waiting for button press...")
-print("[SYSTEM] Press Ctrl+C to exit gracefully")
+logger.info("[SYSTEM] Initialized. Waiting for button press...")
+logger.info("[SYSTEM] Press Ctrl+C to exit gracefully")
+
+# Set once HELP_SOUND is in PulseAudio's sample cache; play_sound then skips ffplay
+help_sample_loaded = False
+help_sound_seconds = 0.0
+
+def load_help_sample():
+    """Upload Help_me.wav vào sample cache của PulseAudio một lần (phát bằng pactl play-sample)"""
+    global help_sample_loaded, help_sound_seconds
+    try:
+        with wave.open(HELP_SOUND, "rb") as w:
+            help_sound_seconds = w.getnframes() / w.getframerate()
+        result = subprocess.run(
+            ["pactl", "upload-sample", HELP_SOUND, HELP_SAMPLE_NAME],
+            env={"PULSE_SERVER": PULSE_SERVER},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        help_sample_loaded = result.returncode == 0
+    except (OSError, EOFError, wave.Error) as e:
+        logger.warning(f"[SOUND] Could not cache {HELP_SOUND}: {e}")
+
+    if help_sample_loaded:
+        logger.info(f"[SOUND] {HELP_SOUND} cached in PulseAudio ({help_sound_seconds:.1f}s)")
+    else:
+        logger.warning("[SOUND] PulseAudio sample cache unavailable, using ffplay")
 
 def play_sound():
+    """Bắt đầu phát Help_me; trả về thời điểm (time.monotonic) lời nhắc phát xong.
+    Với sample cache thì không chờ, để micro mở song song trong lúc phát."""
+    if not help_sample_loaded:
+        # PulseAudio may not have been up at boot; try again before falling back to ffplay
+        load_help_sample()
+    if help_sample_loaded:
+        result = subprocess.run(
+            ["pactl", "play-sample", HELP_SAMPLE_NAME],
+            env={"PULSE_SERVER": PULSE_SERVER},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if result.returncode == 0:
+            # play-sample returns immediately; the caller drops mic audio until the clip ends
+            return time.monotonic() + help_sound_seconds + PROMPT_TAIL_SECONDS
+
     subprocess.run(
         ["ffplay", "-nodisp", "-autoexit", HELP_SOUND],
         env={"PULSE_SERVER": PULSE_SERVER},
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL
     )
+    return time.monotonic()
 
-def get_next_filename():
+# Counter state: counter.txt is opened and flock'ed once at startup; numbers are handed out
+# from memory and the file is only updated in the page cache (fdatasync at exit)
+counter_fd = None
+counter_lock = threading.Lock()
+next_count = 1
+
+def open_counter():
     """
-    Atomically read and increment the counter file with exclusive file locking.
-    Prevents race conditions when multiple processes try to get filenames concurrently.
+    Load counter.txt into memory and keep an exclusive flock on it for the life of the process,
+    so a second instance cannot hand out the same filenames (it falls back to timestamps).
     """
-    # Open counter file in read-write mode, create if doesn't exist
+    global counter_fd, next_count
     try:
-        # Use 'r+' if file exists, otherwise 'w+' to create
-        # Open in 'a+' mode (create if doesn't exist, read/write if exists)
-        f = open(COUNTER_FILE, "a+")        
+        fd = os.open(COUNTER_FILE, os.O_RDWR | os.O_CREAT, 0o644)
         try:
-            # Acquire exclusive lock (blocks until lock is available)
-            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-            
-            # Read current counter value
-            f.seek(0)
-            content = f.read().strip()
-            
-            if content and content.isdigit():
-                count = int(content)
-            else:
-                count = 1  # Default to 1 if file is empty or invalid
-            
-            filename = os.path.join(SAVE_DIR, f"record_{count}.wav")
-            
-            # Write incremented counter atomically
-            f.seek(0)
-            f.truncate()
-            f.write(str(count + 1))
-            f.flush()  # Ensure data is written to disk
-            os.fsync(f.fileno())  # Force OS to write to disk
-            
-            # Lock is automatically released when file is closed
-            
-        finally:
-            # Release lock and close file
-            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-            f.close()
-        
-        return filename
-        
-    except Exception as e:
-        print(f"[COUNTER] Error accessing counter file: {e}")
-        # Fallback to timestamp-based filename if counter fails
-        timestamp = int(time.time())
-        filename = os.path.join(SAVE_DIR, f"record_{timestamp}.wav")
-        print(f"[COUNTER] Using timestamp-based filename: {filename}")
-        return filename
-
-def record_audio():
-    """Ghi âm 15 giây và tăng âm lượng trực tiếp"""
-    wav_file = get_next_filename()
-    print(f"[RECORD] recording started for {RECORD_SECONDS}s... → {wav_file}")
-
-    time.sleep(0.5)
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            raise
+
+        content = os.pread(fd, 32, 0).decode("ascii", errors="ignore").strip()
+        next_count = int(content) if content.isdigit() else 1  # Default to 1 if empty or invalid
+
+        # Normalize the file once; afterwards the value only grows, so pwrite never needs truncating
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, str(next_count).encode("ascii"), 0)
+        counter_fd = fd
+        atexit.register(persist_counter)
+        logger.info(f"[COUNTER] Next recording number: {next_count}")
+    except OSError as e:
+        logger.warning(f"[COUNTER] Counter file unavailable ({e}), using timestamp-based filenames")
+
+def persist_counter():
+    """Flush counter.txt to the SD card once, at exit"""
+    if counter_fd is not None:
+        with counter_lock:
+            os.fdatasync(counter_fd)
 
+def get_next_filename():
+    """Next record_N.mp3 name; the counter lives in memory and is mirrored to counter.txt"""
+    global next_count
+    if counter_fd is not None:
+        with counter_lock:
+            count = next_count
+            next_count += 1
+            try:
+                os.pwrite(counter_fd, str(next_count).encode("ascii"), 0)
+            except OSError as e:
+                logger.warning(f"[COUNTER] Could not update counter file: {e}")
+        return os.path.join(SAVE_DIR, f"record_{count}.mp3")
+
+    # Fallback to timestamp-based filename if the counter file is unavailable
+    timestamp = int(time.time())
+    filename = os.path.join(SAVE_DIR, f"record_{timestamp}.mp3")
+    logger.warning(f"[COUNTER] Using timestamp-based filename: {filename}")
+    return filename
+
+open_counter()
+
+def capture_mp3_pyav(prompt_end):
+    """Ghi âm + tăng âm lượng + nén MP3 ngay trong process bằng PyAV (không spawn ffmpeg)"""
+    out_buf = io.BytesIO()
+    total_samples = RECORD_SECONDS * SAMPLE_RATE
+    captured = 0
+
+    with av.open(MIC_DEVICE, format="alsa",
+                 options={"sample_rate": str(SAMPLE_RATE), "channels": "1"}) as inp:
+        with av.open(out_buf, "w", format="mp3") as out:
+            stream = out.add_stream("libmp3lame", rate=SAMPLE_RATE, layout="mono")
+            stream.bit_rate = MP3_BITRATE
+            for frame in inp.decode(audio=0):
+                # Device is opened while the prompt plays; drop its echo from the recording
+                if time.monotonic() < prompt_end:
+                    continue
+                # Same clipping gain as ffmpeg's volume filter, in Q8 fixed point: widen, multiply,
+                # shift and saturate in place (vectorized integer ops, no float64 temporaries)
+                samples = frame.to_ndarray()
+                dtype = samples.dtype
+                limits = np.iinfo(dtype)
+                wide = samples.astype(np.int64 if dtype.itemsize >= 4 else np.int32)
+                wide *= VOLUME_GAIN_Q8
+                wide >>= 8
+                np.clip(wide, limits.min, limits.max, out=wide)
+                boosted = av.AudioFrame.from_ndarray(wide.astype(dtype), format=frame.format.name, layout=frame.layout.name)
+                boosted.sample_rate = frame.sample_rate
+                for packet in stream.encode(boosted):
+                    out.mux(packet)
+                captured += frame.samples
+                if captured >= total_samples:
+                    break
+            for packet in stream.encode(None):
+                out.mux(packet)
+
+    return out_buf.getvalue()
+
+def capture_mp3_ffmpeg(prompt_end):
+    """Ghi âm + tăng âm lượng + nén MP3 bằng một lệnh ffmpeg; MP3 trả về qua stdout"""
+    # Output-side -ss decodes and discards the audio captured while the prompt is still playing
+    skip_seconds = max(0.0, prompt_end - time.monotonic())
     cmd_record = [
-        "arecord",
-        "-D", MIC_DEVICE,
-        "-f", "S16_LE",
-        "-r", str(SAMPLE_RATE),
-        "-c", "1",
-        "-d", str(RECORD_SECONDS),  # Duration in seconds (proper way to record fixed length)
-        wav_file
+        "ffmpeg", "-y",
+        "-f", "alsa",
+        "-ac", "1",
+        "-ar", str(SAMPLE_RATE),
+        "-i", MIC_DEVICE,
+        "-ss", f"{skip_seconds:.2f}",
+        "-t", str(RECORD_SECONDS),
+        "-af", f"volume={VOLUME_GAIN}",
+        "-codec:a", "libmp3lame",
+        "-b:a", str(MP3_BITRATE),
+        "-f", "mp3",
+        "pipe:1"
     ]
 
-    try:
-        # No timeout needed since -d parameter handles recording duration
-        result = subprocess.run(cmd_record, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"[RECORD] arecord error: {result.stderr}")
-            raise RuntimeError(f"arecord failed with exit code {result.returncode}")
-    except Exception as e:
-        print(f"[RECORD] Recording failed: {e}")
-        raise
-
-    # Tăng âm lượng trực tiếp trên cùng file WAV (same as old code)
-    tmp_file = wav_file + ".tmp.wav"
-    
-    # Use shell=True like old code (safe since we control all parameters)
-    ffmpeg_cmd = f"ffmpeg -y -i {wav_file} -filter:a 'volume={VOLUME_GAIN}' {tmp_file}"
-    
-    result = subprocess.run(
-        ffmpeg_cmd,
-        shell=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
-    
-    if result.returncode == 0 and os.path.exists(tmp_file):
-        os.replace(tmp_file, wav_file)
-        print(f"[RECORD] recording finished and saved successfully: {wav_file}")
-    else:
-        print(f"[RECORD] Warning: ffmpeg volume adjustment may have failed")
-        # Continue anyway, original WAV file still exists
-        if os.path.exists(tmp_file):
-            os.remove(tmp_file)
-    
-    return wav_file
+    result = subprocess.run(cmd_record, capture_output=True)
+    if result.returncode != 0 or not result.stdout:
+        logger.error(f"[RECORD] ffmpeg error: {result.stderr.decode(errors='replace')}")
+        raise RuntimeError(f"ffmpeg failed with exit code {result.returncode}")
+    return result.stdout
+
+def record_audio(prompt_end):
+    """Ghi âm 15 giây sau khi lời nhắc kết thúc (prompt_end, time.monotonic), tăng âm lượng và
+    nén MP3 (PyAV nếu có, nếu không thì ffmpeg).
+    Trả về (tên file, dữ liệu MP3) - MP3 giữ trong bộ nhớ, chỉ ghi ra thẻ nhớ khi upload lỗi"""
+    mp3_file = get_next_filename()
+    logger.info(f"[RECORD] recording started for {RECORD_SECONDS}s... → {mp3_file}")
+
+    audio_data = None
+    if PYAV_AVAILABLE:
+        try:
+            audio_data = capture_mp3_pyav(prompt_end)
+        except Exception as e:
+            logger.warning(f"[RECORD] PyAV capture failed ({e}), falling back to ffmpeg")
 
-def convert_to_mp3(wav_path):
-    """Chuyển WAV sang MP3 và xóa file WAV"""
-    if not os.path.exists(wav_path):
-        print("[CONVERT] WAV file not found, skipping MP3 conversion.")
+    if not audio_data:
+        try:
+            audio_data = capture_mp3_ffmpeg(prompt_end)
+        except Exception as e:
+            logger.error(f"[RECORD] Recording failed: {e}")
+            raise
+
+    logger.info(f"[RECORD] recording finished: {mp3_file} ({len(audio_data)} bytes)")
+    return mp3_file, audio_data
+
+def save_recording(mp3_path, audio_data):
+    """Lưu MP3 ra thẻ nhớ để không mất bản ghi khi upload thất bại; trả về đường dẫn hoặc None"""
+    if os.path.exists(mp3_path):
+        # Counter reused after an unclean shutdown: never overwrite a pending recording
+        mp3_path = mp3_path.replace(".mp3", f"_{int(time.time())}.mp3")
+    try:
+        with open(mp3_path, "wb") as f:
+            f.write(audio_data)
+        logger.info(f"[UPLOAD] MP3 kept on disk for later: {mp3_path}")
+        return mp3_path
+    except OSError as e:
+        logger.error(f"[UPLOAD] Could not save {mp3_path}: {e}")
         return None
 
-    mp3_path = wav_path.replace(".wav", ".mp3")
-    subprocess.run([
-        "ffmpeg", "-y",
-        "-i", wav_path,
-        "-codec:a", "libmp3lame",
-        "-qscale:a", "2",
-        mp3_path
-    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-    os.remove(wav_path)
-    print(f"[CONVERT] MP3 file saved: {mp3_path}")
-    return mp3_path
-
 def send_to_web_app(audio_url):
     """Send audio URL to Web App (Web App will add GPS from drone stream)"""
-    print(f"[API] Sending to Web App: {WEB_APP_URL}")
+    logger.info(f"[API] Sending to Web App: {WEB_APP_URL}")
     
-    payload = {
-        "device_id": DEVICE_ID,
-        "audio_url": audio_url,
-        "duration": RECORD_SECONDS
-    }
+    payload = {**BASE_PAYLOAD, "audio_url": audio_url}
     
     try:
-        response = requests.post(WEB_APP_URL, json=payload, timeout=30)
+        response = http_session.post(WEB_APP_URL, json=payload, timeout=(5, 30))
         response.raise_for_status()
-        data = response.json()
-        print("[API] Response from Web App:")
-        print(json.dumps(data, indent=2, ensure_ascii=False))
+        logger.info(f"[API] Web App accepted the recording (HTTP {response.status_code})")
+        # Pretty-printing the response body is debug output only
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                logger.debug("[API] Response from Web App:\n%s", json.dumps(response.json(), indent=2, ensure_ascii=False))
+            except ValueError:
+                logger.debug(f"[API] Response is not valid JSON: {response.text}")
         return True
     except requests.exceptions.RequestException as e:
-        print(f"[API] Failed to send to Web App: {e}")
+        logger.error(f"[API] Failed to send to Web App: {e}")
         return False
-    except json.JSONDecodeError:
-        print(f"[API] Response is not valid JSON: {response.text}")
-        return False
-
-def upload_to_cloudinary(mp3_path):
-    """Upload file MP3 lên Cloudinary và xóa sau khi upload thành công"""
-    if not os.path.exists(mp3_path):
-        print("[UPLOAD] MP3 file not found, skipping upload.")
-        return None # Trả về None nếu không thành công
 
+def upload_to_cloudinary(mp3_path, audio_data):
+    """Upload MP3 (từ bộ nhớ) lên Cloudinary, thử lại với backoff; trả về URL hoặc None"""
+    for attempt in range(1, UPLOAD_RETRIES + 1):
+        try:
+            logger.info(f"[UPLOAD] Uploading {mp3_path} ...")
+            response = cloudinary.uploader.upload(
+                io.BytesIO(audio_data),
+                resource_type="auto",
+                folder=CLOUD_FOLDER
+            )
+            secure_url = response.get("secure_url")
+            logger.info(f"[UPLOAD] Uploaded successfully: {secure_url}")
+            return secure_url # Trả về URL thành công
+        except Exception as e:
+            logger.warning(f"[UPLOAD] Upload failed (attempt {attempt}/{UPLOAD_RETRIES}): {e}")
+            if attempt < UPLOAD_RETRIES:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+    logger.error(f"[UPLOAD] Giving up on {mp3_path} for now")
+    return None
+
+def add_pending(entry):
+    """Ghi lại bản ghi chưa gửi được vào PENDING_FILE để thử lại sau (kể cả sau khi reboot)"""
+    entry["ts"] = int(time.time())
     try:
-        print(f"[UPLOAD] Uploading {mp3_path} ...")
-        response = cloudinary.uploader.upload(
-            mp3_path,
-            resource_type="auto",
-            folder=CLOUD_FOLDER
-        )
-        secure_url = response.get("secure_url")
-        print("[UPLOAD] Uploaded successfully:", secure_url)
+        with pending_lock, open(PENDING_FILE, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        logger.info(f"[PENDING] Queued for retry: {entry}")
+    except OSError as e:
+        logger.error(f"[PENDING] Could not write {PENDING_FILE}: {e}")
 
-        # Xóa file sau khi upload thành công
+def read_pending():
+    try:
+        with open(PENDING_FILE) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        logger.error(f"[PENDING] Could not read {PENDING_FILE}: {e}")
+        return []
+
+def retry_pending_entry(entry):
+    """Thử gửi lại một bản ghi; trả về entry còn lại (nếu vẫn lỗi) hoặc None"""
+    audio_url = entry.get("audio_url")
+    if not audio_url:
+        mp3_path = entry["mp3"]
+        try:
+            with open(mp3_path, "rb") as f:
+                audio_data = f.read()
+        except OSError as e:
+            logger.error(f"[PENDING] Dropping {mp3_path}: {e}")
+            return None
+        audio_url = upload_to_cloudinary(mp3_path, audio_data)
+        if not audio_url:
+            return entry
         os.remove(mp3_path)
-        print(f"[UPLOAD] MP3 file deleted: {mp3_path}")
-        return secure_url # Trả về URL thành công
+        entry = {"audio_url": audio_url, "ts": entry.get("ts")}
+    return None if send_to_web_app(audio_url) else entry
+
+def drain_pending():
+    """Retry everything in PENDING_FILE, stopping at the first failure (network still down)"""
+    with pending_lock:
+        entries = read_pending()
+    if not entries:
+        return
+    logger.info(f"[PENDING] Retrying {len(entries)} pending recording(s)")
+
+    survivors = []
+    for i, entry in enumerate(entries):
+        remaining = retry_pending_entry(entry)
+        if remaining is not None:
+            survivors.append(remaining)
+            survivors.extend(entries[i + 1:])
+            break
+
+    with pending_lock:
+        # Keep entries appended by upload workers while we were draining
+        added = read_pending()[len(entries):]
+        tmp_file = PENDING_FILE + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.writelines(json.dumps(e) + "\n" for e in survivors + added)
+        os.replace(tmp_file, PENDING_FILE)
+    logger.info(f"[PENDING] {len(survivors) + len(added)} recording(s) still pending")
+
+def pending_worker():
+    while True:
+        pending_event.wait(timeout=PENDING_RETRY_INTERVAL)
+        pending_event.clear()
+        try:
+            drain_pending()
+        except Exception as e:
+            logger.error(f"[PENDING] Retry error: {e}")
+
+def upload_and_notify(mp3_path, audio_data):
+    """Upload lên Cloudinary rồi gửi URL tới Web App; lỗi thì đưa vào hàng đợi thử lại"""
+    # Upload lên Cloudinary và lấy URL
+    cloudinary_url = upload_to_cloudinary(mp3_path, audio_data)
+    if not cloudinary_url:
+        saved_path = save_recording(mp3_path, audio_data)
+        if saved_path:
+            add_pending({"mp3": saved_path})
+        return
+
+    # 🚀 Gửi URL + GPS tới Web App (Web App sẽ trigger AI service)
+    if send_to_web_app(cloudinary_url):
+        pending_event.set()  # network is back: retry anything queued earlier
+    else:
+        add_pending({"audio_url": cloudinary_url})
+
+def _background_upload(mp3_path, audio_data):
+    try:
+        upload_and_notify(mp3_path, audio_data)
     except Exception as e:
-        print(f"[UPLOAD] Upload failed: {e}")
-        return None
+        logger.error(f"[UPLOAD] Background upload error: {e}")
+    finally:
+        upload_slots.release()
 
 def process_recording():
     """Xử lý ghi âm - function chung cho cả GPIO và web trigger"""
-    print("[TRIGGER] Recording triggered — playing Help_me.wav then recording...")
-
-    # Phát âm thanh Help_me
-    play_sound()
+    logger.info("[TRIGGER] Recording triggered — playing Help_me.wav then recording...")
 
-    # Ghi âm + tăng âm lượng
-    wav_file = record_audio()
+    # Phát âm thanh Help_me và mở micro ngay trong lúc phát (phần lời nhắc bị bỏ khỏi bản ghi)
+    prompt_end = play_sound()
 
-    # Chuyển sang MP3
-    mp3_file = convert_to_mp3(wav_file)
+    # Ghi âm + tăng âm lượng + MP3
+    mp3_file, audio_data = record_audio(prompt_end)
 
-    # Upload lên Cloudinary và lấy URL
-    cloudinary_url = None
-    if mp3_file:
-        cloudinary_url = upload_to_cloudinary(mp3_file)
-        
-    # 🚀 Gửi URL + GPS tới Web App (Web App sẽ trigger AI service)
-    if cloudinary_url:
-        send_to_web_app(cloudinary_url)
+    if audio_data:
+        if upload_slots.acquire(blocking=False):
+            upload_pool.submit(_background_upload, mp3_file, audio_data)
+            logger.info(f"[UPLOAD] Queued for background upload: {mp3_file}")
+        else:
+            logger.warning("[UPLOAD] Upload queue full, uploading inline...")
+            upload_and_notify(mp3_file, audio_data)
 
-    print("[TRIGGER] Returning to standby mode...\n")
+    logger.info("[TRIGGER] Returning to standby mode...")
 
 # ----------------- SOCKET.IO EVENT HANDLERS -----------------
 @sio.on('connect')
 def on_connect():
-    print("[SOCKET] Connected to Web App")
+    logger.info("[SOCKET] Connected to Web App")
     sio.emit('register_record_device', {'device_id': DEVICE_ID})
 
 @sio.on('disconnect')
 def on_disconnect():
-    print("[SOCKET] Disconnected from Web App")
+    logger.info("[SOCKET] Disconnected from Web App")
 
 @sio.on('trigger_recording')
 def on_trigger_recording(data):
     """Nhận lệnh trigger recording từ web"""
-    global web_trigger_flag
-    
-    print(f"[SOCKET] Received trigger_recording event: {data}")
+    logger.info(f"[SOCKET] Received trigger_recording event: {data}")
     
-    with web_trigger_lock:
-        if web_trigger_flag:
-            print("[SOCKET] Recording already in progress, ignoring trigger")
-            return
-        web_trigger_flag = True
-        print("[SOCKET] Web trigger flag set to True")
+    try:
+        trigger_queue.put_nowait("web")
+        logger.info("[SOCKET] Web trigger queued")
+    except queue.Full:
+        logger.warning("[SOCKET] A recording is already pending, ignoring trigger")
 
 # Connect to Web App Socket.IO server
 def connect_to_web_app():
     """Kết nối đến Web App Socket.IO server"""
     try:
-        print(f"[SOCKET] Connecting to {WEB_APP_SOCKET_URL}...")
+        logger.info(f"[SOCKET] Connecting to {WEB_APP_SOCKET_URL}...")
         sio.connect(WEB_APP_SOCKET_URL)
-        print("[SOCKET] Connection initiated")
+        logger.info("[SOCKET] Connection initiated")
     except Exception as e:
-        print(f"[SOCKET] Failed to connect: {e}")
-        print("[SOCKET] Will retry in background...")
+        logger.warning(f"[SOCKET] Failed to connect: {e}")
+        logger.warning("[SOCKET] Will retry in background...")
+
+def on_button_press(channel):
+    """GPIO edge callback (runs on the RPi.GPIO event thread)"""
+    # Presses made while recording are ignored, as with the old polling loop
+    if recording_active.is_set():
+        return
+    try:
+        trigger_queue.put_nowait("button")
+    except queue.Full:
+        pass
+
+# Button is pulled up, so a press is a falling edge; bouncetime filters contact bounce
+GPIO.add_event_detect(BUTTON_PIN, GPIO.FALLING, callback=on_button_press, bouncetime=BUTTON_BOUNCE_MS)
+
+def prewarm():
+    """Pay first-press costs at boot: DNS, Web App TLS connection, help sound in PulseAudio's
+    sample cache, ffmpeg/ffplay in the page cache. Runs in the background so startup is not delayed."""
+    load_help_sample()
+
+    for host in ("api.cloudinary.com", urlparse(WEB_APP_URL).hostname):
+        try:
+            socket.getaddrinfo(host, 443)
+        except OSError as e:
+            logger.warning(f"[PREWARM] DNS lookup failed for {host}: {e}")
+
+    try:
+        # Opens the pooled keep-alive connection; the status code does not matter
+        http_session.head(WEB_APP_URL, timeout=5)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"[PREWARM] Web App not reachable yet: {e}")
+
+    # ffplay is only needed when the PulseAudio sample cache is unavailable
+    binaries = [] if help_sample_loaded else ["ffplay"]
+    if not PYAV_AVAILABLE:
+        binaries.append("ffmpeg")
+    for binary in binaries:
+        try:
+            subprocess.run([binary, "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logger.warning(f"[PREWARM] {binary} not available: {e}")
+    logger.info("[PREWARM] Done")
+
+threading.Thread(target=prewarm, daemon=True).start()
 
 # Start Socket.IO connection in background
 connection_thread = threading.Thread(target=connect_to_web_app, daemon=True)
 connection_thread.start()
 
+# Retry uploads left over from earlier runs, then after every successful send
+threading.Thread(target=pending_worker, daemon=True).start()
+pending_event.set()
+
 # ----------------- VÒNG LẶP CHÍNH -----------------
 try:
     while True:
-        # Kiểm tra nút GPIO vật lý
-        if GPIO.input(BUTTON_PIN) == GPIO.LOW:
-            print("[BUTTON] Physical button pressed")
+        # Ngủ cho đến khi có nút nhấn hoặc web trigger. Blocking get() takes no periodic
+        # wakeups; SIGINT/SIGTERM still interrupt the wait (POSIX lock waits are interruptible)
+        source = trigger_queue.get()
+
+        if source == "button":
+            logger.info("[BUTTON] Physical button pressed")
+        else:
+            logger.info("[WEB] Web trigger activated")
+
+        recording_active.set()
+        try:
             process_recording()
-            sleep(1)
-        
-        # Kiểm tra web trigger từ Socket.IO
-        with web_trigger_lock:
-            if web_trigger_flag:
-                print("[WEB] Web trigger activated")
-                web_trigger_flag = False  # Reset flag
-                process_recording()
-                sleep(1)
-        
-        sleep(0.05)
+        finally:
+            recording_active.clear()
 
 except KeyboardInterrupt:
-    print("\n[INTERRUPT] Keyboard interrupt detected")
+    logger.info("[INTERRUPT] Keyboard interrupt detected")
 except Exception as e:
-    print(f"\n[ERROR] Unexpected error in main loop: {e}")
+    logger.error(f"[ERROR] Unexpected error in main loop: {e}")
 finally:
     cleanup_resources()
-    print("[SYSTEM] Script terminated")
+    logger.info("[SYSTEM] Script terminated")
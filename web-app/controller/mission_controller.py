@@ -75,7 +75,11 @@ def handle_mission(mission_id):
     """Get, update or delete a specific mission"""
     try:
         with get_db() as db:
-            mission = mission_service.get_mission(db, mission_id)
+            # Full row only for GET; PUT/DELETE just need to know the mission exists
+            if request.method == 'GET':
+                mission = mission_service.get_mission(db, mission_id)
+            else:
+                mission = mission_service.get_mission_summary(db, mission_id)
             
             if not mission:
                 return jsonify({
@@ -231,6 +235,34 @@ def handle_orders():
                 'message': str(e)
             }), 500
 
+@mission_blueprint.route('/api/orders/bulk', methods=['POST'])
+def bulk_create_orders():
+    """Create several orders in one transaction"""
+    try:
+        data = request.json
+        
+        with get_db() as db:
+            order_ids = order_service.bulk_create_orders(db, data.get('orders', []))
+            
+            return jsonify({
+                'status': 'success',
+                'message': f'{len(order_ids)} order(s) created successfully',
+                'order_ids': order_ids
+            }), 201
+            
+    except ValueError as e:
+        logger.warning(f"Rejected order batch: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error creating orders: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to create orders, none were saved: {e}'
+        }), 500
+
 @mission_blueprint.route('/api/orders/<int:order_id>', methods=['GET', 'PUT', 'DELETE'])
 def handle_order(order_id):
     """Get, update or delete a specific order"""
@@ -3,7 +3,7 @@ Database models for Mission, Waypoint, Route, and Order management
 """
 from sqlalchemy import (
     Column, Integer, String, Float, DateTime, Boolean, 
-    ForeignKey, Enum, Text, JSON, Index
+    ForeignKey, Enum, Text, JSON, Index, Computed
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -137,9 +137,14 @@ class Mission(Base):
     routes = relationship("Route", back_populates="mission", cascade="all, delete-orphan")
     orders = relationship("Order", back_populates="mission", cascade="all, delete-orphan")
     
+    # Fetch server-generated timestamps with INSERT/UPDATE ... RETURNING instead of a later SELECT
+    __mapper_args__ = {'eager_defaults': True}
+    
     # Indexes for performance
     __table_args__ = (
-        Index('ix_mission_device_status', 'device_id', 'status'),
+        # Serves get_all_missions (device/status filter, newest first, LIMIT) without a sort;
+        # also covers device_id-only lookups as its prefix
+        Index('ix_mission_device_status_created', 'device_id', 'status', created_at.desc()),
         Index('ix_mission_type_status', 'mission_type', 'status'),
     )
     
@@ -354,7 +359,8 @@ class Order(Base):
     package_weight = Column(Float, comment="Package weight in kg")
     package_dimensions = Column(JSON, comment="{length, width, height} in cm")
     items = Column(JSON, default=[], comment="List of items in the order")
-    item_count = Column(Integer, default=1)
+    # Maintained by the database from items (JSON column, so json_array_length)
+    item_count = Column(Integer, Computed("COALESCE(json_array_length(items), 0)", persisted=True))
     
     # Special Requirements
     temperature_controlled = Column(Boolean, default=False)
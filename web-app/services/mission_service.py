@@ -3,10 +3,12 @@ Mission service - Business logic layer for mission operations
 Handles CRUD operations and complex mission workflows
 """
 from typing import List, Dict, Optional
-from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from datetime import datetime, timezone
+from functools import lru_cache
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import insert, select
 import logging
+import numpy as np
 
 from model.mission_model import (
     Mission, Waypoint, Route, Order,
@@ -16,13 +18,41 @@ from services.route_optimizer import RouteOptimizer
 
 logger = logging.getLogger(__name__)
 
+# Case-insensitive enum lookups by member name ('survey' -> MissionType.SURVEY), built once
+_MISSION_TYPES = {name.lower(): member for name, member in MissionType.__members__.items()}
+_MISSION_STATUSES = {name.lower(): member for name, member in MissionStatus.__members__.items()}
+_WAYPOINT_TYPES = {name.lower(): member for name, member in WaypointType.__members__.items()}
+_ORDER_CATEGORIES = {name.lower(): member for name, member in OrderCategory.__members__.items()}
+_ORDER_PRIORITIES = {name.lower(): member for name, member in OrderPriority.__members__.items()}
+
+# Mission columns update_mission may write (everything except the key and creation time)
+_MISSION_UPDATABLE = frozenset(column.name for column in Mission.__table__.columns) - {'id', 'created_at'}
+
+@lru_cache(maxsize=256)
+def _parse_iso_datetime(value: str) -> datetime:
+    """ISO 8601 string -> datetime; accepts a trailing 'Z' (UTC)"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+def _parse_datetime(value) -> Optional[datetime]:
+    """Schedule field from the API: epoch seconds (UTC) or ISO 8601 string; empty -> None"""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if not value:
+        return None
+    return _parse_iso_datetime(value)
+
+# RouteOptimizer is stateless; one shared instance serves every MissionService
+_route_optimizer = RouteOptimizer()
+
 class MissionService:
     """
     Service class for mission management
     """
     
     def __init__(self):
-        self.route_optimizer = RouteOptimizer()
+        self.route_optimizer = _route_optimizer
     
     def create_mission(self, db: Session, mission_data: Dict) -> Mission:
         """
@@ -42,7 +72,7 @@ class MissionService:
             # Create mission
             mission = Mission(
                 name=mission_data['name'],
-                mission_type=MissionType[mission_data.get('mission_type', mission_data.get('type', 'survey')).upper()],
+                mission_type=_MISSION_TYPES[mission_data.get('mission_type', mission_data.get('type', 'survey')).lower()],
                 device_id=mission_data.get('device_id', 'drone1'),
                 device_name=mission_data.get('device_name', 'Drone 1'),
                 flight_height=mission_data.get('flight_altitude', config.get('flightHeight', 50.0)),
@@ -56,7 +86,7 @@ class MissionService:
                 obstacle_avoidance=mission_data.get('enable_obstacle_avoidance', config.get('obstacleAvoidance', True)),
                 geofencing=mission_data.get('enable_geofencing', config.get('geofencing', True)),
                 emergency_rth=config.get('emergencyRTH', True),
-                scheduled_start=datetime.fromisoformat(mission_data['startTime']) if mission_data.get('startTime') else None,
+                scheduled_start=_parse_datetime(mission_data.get('startTime')),
                 description=mission_data.get('description', ''),
                 notes=mission_data.get('notes', ''),
                 custom_data=mission_data.get('custom_data', mission_data.get('metadata', {}))
@@ -72,23 +102,24 @@ class MissionService:
             if mission_data.get('optimize', True) and len(waypoints_data) > 2:
                 waypoints_data = self.route_optimizer.optimize_waypoints_tsp(waypoints_data)
             
-            # Create waypoints
-            for wp_data in waypoints_data:
-                waypoint = Waypoint(
-                    mission_id=mission.id,
-                    sequence=wp_data.get('sequence', 0),
-                    name=wp_data.get('name'),
-                    waypoint_type=WaypointType[wp_data.get('type', 'point').upper()],
-                    latitude=wp_data.get('lat', wp_data.get('latitude')),
-                    longitude=wp_data.get('lng', wp_data.get('longitude')),
-                    altitude=wp_data.get('altitude', mission.flight_height),
-                    action=wp_data.get('action'),
-                    action_params=wp_data.get('action_params', {}),
-                    hover_time=wp_data.get('hover_time', 0.0),
-                    notes=wp_data.get('notes', ''),
-                    custom_data=wp_data.get('custom_data', wp_data.get('metadata', {}))
-                )
-                db.add(waypoint)
+            # Create waypoints (one executemany INSERT instead of an ORM flush per row)
+            db.bulk_insert_mappings(Waypoint, [
+                {
+                    'mission_id': mission.id,
+                    'sequence': wp_data.get('sequence', 0),
+                    'name': wp_data.get('name'),
+                    'waypoint_type': _WAYPOINT_TYPES[wp_data.get('type', 'point').lower()],
+                    'latitude': wp_data.get('lat', wp_data.get('latitude')),
+                    'longitude': wp_data.get('lng', wp_data.get('longitude')),
+                    'altitude': wp_data.get('altitude', mission.flight_height),
+                    'action': wp_data.get('action'),
+                    'action_params': wp_data.get('action_params', {}),
+                    'hover_time': wp_data.get('hover_time', 0.0),
+                    'notes': wp_data.get('notes', ''),
+                    'custom_data': wp_data.get('custom_data', wp_data.get('metadata', {}))
+                }
+                for wp_data in waypoints_data
+            ])
             
             # Calculate mission statistics
             if waypoints_data:
@@ -104,7 +135,8 @@ class MissionService:
                 mission.waypoint_count = stats['waypoint_count']
             
             db.commit()
-            db.refresh(mission)
+            # Waypoints were replaced with bulk statements; reload just that collection on access
+            db.expire(mission, ['waypoints'])
             
             logger.info(f"Created mission: {mission.name} (ID: {mission.id})")
             return mission
@@ -118,6 +150,18 @@ class MissionService:
         """Get mission by ID"""
         return db.query(Mission).filter(Mission.id == mission_id).first()
     
+    def get_mission_summary(self, db: Session, mission_id: int):
+        """
+        Get (id, name, status) of a mission without loading the full row
+        (JSON columns, relationships) - for existence/status checks
+        
+        Returns:
+            Row with id, name and status attributes, or None
+        """
+        return db.execute(
+            select(Mission.id, Mission.name, Mission.status).where(Mission.id == mission_id)
+        ).first()
+    
     def get_all_missions(
         self, 
         db: Session, 
@@ -160,23 +204,32 @@ class MissionService:
             Updated Mission object
         """
         try:
-            mission = self.get_mission(db, mission_id)
-            if not mission:
-                raise ValueError(f"Mission {mission_id} not found")
-            
-            # Update allowed fields
+            # Keep only updatable columns, converting enum names up front
+            values = {}
             for key, value in update_data.items():
-                if hasattr(mission, key) and key not in ['id', 'created_at']:
-                    # Handle enum conversions
-                    if key == 'status' and isinstance(value, str):
-                        value = MissionStatus[value.upper()]
-                    elif key == 'mission_type' and isinstance(value, str):
-                        value = MissionType[value.upper()]
-                    
-                    setattr(mission, key, value)
+                if key not in _MISSION_UPDATABLE:
+                    continue
+                # Handle enum conversions
+                if key == 'status' and isinstance(value, str):
+                    value = _MISSION_STATUSES[value.lower()]
+                elif key == 'mission_type' and isinstance(value, str):
+                    value = _MISSION_TYPES[value.lower()]
+                values[key] = value
+            
+            # Single UPDATE statement; the row is loaded once afterwards for the response
+            if values:
+                updated = db.query(Mission).filter(Mission.id == mission_id).update(
+                    values, synchronize_session=False
+                )
+                if not updated:
+                    raise ValueError(f"Mission {mission_id} not found")
+                db.commit()
             
-            db.commit()
-            db.refresh(mission)
+            # populate_existing: a copy already in the session (expire_on_commit=False)
+            # would otherwise be returned without the new values
+            mission = db.query(Mission).populate_existing().filter(Mission.id == mission_id).first()
+            if not mission:
+                raise ValueError(f"Mission {mission_id} not found")
             
             logger.info(f"Updated mission: {mission.id}")
             return mission
@@ -198,11 +251,12 @@ class MissionService:
             True if deleted successfully
         """
         try:
-            mission = self.get_mission(db, mission_id)
-            if not mission:
+            # Single DELETE; waypoints, routes and orders go with it through their
+            # ON DELETE CASCADE foreign keys, so nothing has to be loaded first
+            deleted = db.query(Mission).filter(Mission.id == mission_id).delete(synchronize_session=False)
+            if not deleted:
                 return False
             
-            db.delete(mission)
             db.commit()
             
             logger.info(f"Deleted mission: {mission_id}")
@@ -220,10 +274,11 @@ class MissionService:
             raise ValueError(f"Mission {mission_id} not found")
         
         mission.status = MissionStatus.IN_PROGRESS
-        mission.actual_start = datetime.utcnow()
+        mission.actual_start = datetime.now(timezone.utc)
         
+        # No refresh: the session keeps objects loaded after commit and updated_at
+        # comes back with the UPDATE (eager_defaults on Mission)
         db.commit()
-        db.refresh(mission)
         
         logger.info(f"Started mission: {mission.id}")
         return mission
@@ -235,10 +290,9 @@ class MissionService:
             raise ValueError(f"Mission {mission_id} not found")
         
         mission.status = MissionStatus.COMPLETED
-        mission.actual_end = datetime.utcnow()
+        mission.actual_end = datetime.now(timezone.utc)
         
         db.commit()
-        db.refresh(mission)
         
         logger.info(f"Completed mission: {mission.id}")
         return mission
@@ -262,22 +316,24 @@ class MissionService:
             Updated Mission object
         """
         try:
-            mission = self.get_mission(db, mission_id)
+            # Load the mission with its orders (and waypoints, for the default start point)
+            # up front: one selectinload query per relationship instead of separate lookups
+            loaders = [selectinload(Mission.orders)]
+            if not start_point:
+                loaders.append(selectinload(Mission.waypoints))
+            mission = db.query(Mission).options(*loaders).filter(Mission.id == mission_id).first()
             if not mission:
                 raise ValueError(f"Mission {mission_id} not found")
             
-            # Get mission orders
-            orders = db.query(Order).filter(Order.mission_id == mission_id).all()
+            orders = mission.orders
             
             if not orders:
                 raise ValueError("No orders found for this mission")
             
             # Determine start point
             if not start_point:
-                # Use first waypoint or default location
-                first_wp = db.query(Waypoint).filter(
-                    Waypoint.mission_id == mission_id
-                ).order_by(Waypoint.sequence).first()
+                # Use first waypoint (relationship is ordered by sequence) or default location
+                first_wp = mission.waypoints[0] if mission.waypoints else None
                 
                 if first_wp:
                     start_point = {
@@ -288,33 +344,41 @@ class MissionService:
                     # Default to Hanoi coordinates
                     start_point = {'latitude': 21.0285, 'longitude': 105.8542}
             
-            # Convert orders to dict
-            orders_data = [order.to_dict() for order in orders]
-            
-            # Optimize route
-            _, waypoints = self.route_optimizer.optimize_delivery_route(
-                orders_data, 
-                start_point,
+            # Optimize route straight from the order columns (no per-order dicts)
+            priority_weights = self.route_optimizer.PRIORITY_WEIGHTS
+            order_sequence = self.route_optimizer.optimize_delivery_route_arrays(
+                np.asarray([order.pickup_latitude for order in orders], dtype=np.float64),
+                np.asarray([order.pickup_longitude for order in orders], dtype=np.float64),
+                np.asarray([order.delivery_latitude for order in orders], dtype=np.float64),
+                np.asarray([order.delivery_longitude for order in orders], dtype=np.float64),
+                np.asarray([
+                    priority_weights.get(order.priority.value, 2.0) if order.priority else 2.0
+                    for order in orders
+                ], dtype=np.float64),
+                start_point['latitude'],
+                start_point['longitude'],
                 consider_priority=True
             )
+            waypoints = self._delivery_waypoints(orders, order_sequence)
             
             # Delete existing waypoints
-            db.query(Waypoint).filter(Waypoint.mission_id == mission_id).delete()
-            
-            # Create new optimized waypoints
-            for wp_data in waypoints:
-                waypoint = Waypoint(
-                    mission_id=mission_id,
-                    sequence=wp_data['sequence'],
-                    latitude=wp_data['latitude'],
-                    longitude=wp_data['longitude'],
-                    altitude=mission.flight_height,
-                    waypoint_type=WaypointType[wp_data['waypoint_type'].upper()],
-                    action=wp_data['action'],
-                    action_params=wp_data.get('action_params', {}),
-                    name=wp_data.get('name')
-                )
-                db.add(waypoint)
+            db.query(Waypoint).filter(Waypoint.mission_id == mission_id).delete(synchronize_session=False)
+            
+            # Create new optimized waypoints in a single batch
+            db.bulk_insert_mappings(Waypoint, [
+                {
+                    'mission_id': mission_id,
+                    'sequence': wp_data['sequence'],
+                    'latitude': wp_data['latitude'],
+                    'longitude': wp_data['longitude'],
+                    'altitude': mission.flight_height,
+                    'waypoint_type': _WAYPOINT_TYPES[wp_data['waypoint_type'].lower()],
+                    'action': wp_data['action'],
+                    'action_params': wp_data.get('action_params', {}),
+                    'name': wp_data.get('name')
+                }
+                for wp_data in waypoints
+            ])
             
             # Update mission statistics
             stats = self.route_optimizer.calculate_route_statistics(
@@ -328,7 +392,8 @@ class MissionService:
             mission.waypoint_count = stats['waypoint_count']
             
             db.commit()
-            db.refresh(mission)
+            # Waypoints were replaced with bulk statements; reload just that collection on access
+            db.expire(mission, ['waypoints'])
             
             logger.info(f"Optimized route for mission {mission_id}: {len(waypoints)} waypoints")
             return mission
@@ -338,11 +403,72 @@ class MissionService:
             logger.error(f"Error optimizing mission route: {e}")
             raise
 
+    @staticmethod
+    def _delivery_waypoints(orders: List[Order], order_sequence) -> List[Dict]:
+        """Build pickup/delivery waypoint dicts for orders visited in order_sequence"""
+        waypoints = []
+        for order_idx in order_sequence.tolist():
+            order = orders[order_idx]
+            for waypoint_type, latitude, longitude in (
+                ('pickup', order.pickup_latitude, order.pickup_longitude),
+                ('delivery', order.delivery_latitude, order.delivery_longitude)
+            ):
+                waypoints.append({
+                    'sequence': len(waypoints) + 1,
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'waypoint_type': waypoint_type,
+                    'action': waypoint_type,
+                    'action_params': {
+                        'order_id': order.id,
+                        'order_index': order_idx
+                    },
+                    'name': f"{waypoint_type.title()} - Order #{order.order_number}"
+                })
+        return waypoints
+
 class OrderService:
     """
     Service class for order management
     """
     
+    @staticmethod
+    def _build_order_row(order_data: Dict) -> Dict:
+        """Map an API order payload to Order column values"""
+        return {
+            'mission_id': order_data.get('mission_id'),
+            'order_number': order_data['order_number'],
+            'category': _ORDER_CATEGORIES[order_data['category'].lower()],
+            'priority': _ORDER_PRIORITIES[order_data.get('priority', 'medium').lower()],
+            'pickup_latitude': order_data['pickup_location']['lat'],
+            'pickup_longitude': order_data['pickup_location']['lng'],
+            'pickup_address': order_data.get('pickup_address'),
+            'pickup_contact_name': order_data.get('pickup_contact_name'),
+            'pickup_contact_phone': order_data.get('pickup_contact_phone'),
+            'delivery_latitude': order_data['delivery_location']['lat'],
+            'delivery_longitude': order_data['delivery_location']['lng'],
+            'delivery_address': order_data.get('delivery_address'),
+            'delivery_contact_name': order_data.get('delivery_contact_name'),
+            'delivery_contact_phone': order_data.get('delivery_contact_phone'),
+            'package_weight': order_data.get('package_weight'),
+            'package_dimensions': order_data.get('package_dimensions'),
+            'items': order_data.get('items', []),
+            'temperature_controlled': order_data.get('temperature_controlled', False),
+            'temperature_range': order_data.get('temperature_range'),
+            'fragile': order_data.get('fragile', False),
+            'time_sensitive': order_data.get('time_sensitive', False),
+            'special_instructions': order_data.get('special_instructions'),
+            'customer_name': order_data.get('customer_name'),
+            'customer_phone': order_data.get('customer_phone'),
+            'customer_email': order_data.get('customer_email'),
+            'scheduled_pickup': _parse_datetime(order_data.get('scheduled_pickup')),
+            'scheduled_delivery': _parse_datetime(order_data.get('scheduled_delivery')),
+            'delivery_fee': order_data.get('delivery_fee', 0.0),
+            'insurance_value': order_data.get('insurance_value', 0.0),
+            'notes': order_data.get('notes'),
+            'custom_data': order_data.get('custom_data', order_data.get('metadata', {}))
+        }
+    
     def create_order(self, db: Session, order_data: Dict) -> Order:
         """
         Create a new delivery order
@@ -355,40 +481,7 @@ class OrderService:
             Created Order object
         """
         try:
-            order = Order(
-                mission_id=order_data.get('mission_id'),
-                order_number=order_data['order_number'],
-                category=OrderCategory[order_data['category'].upper()],
-                priority=OrderPriority[order_data.get('priority', 'MEDIUM').upper()],
-                pickup_latitude=order_data['pickup_location']['lat'],
-                pickup_longitude=order_data['pickup_location']['lng'],
-                pickup_address=order_data.get('pickup_address'),
-                pickup_contact_name=order_data.get('pickup_contact_name'),
-                pickup_contact_phone=order_data.get('pickup_contact_phone'),
-                delivery_latitude=order_data['delivery_location']['lat'],
-                delivery_longitude=order_data['delivery_location']['lng'],
-                delivery_address=order_data.get('delivery_address'),
-                delivery_contact_name=order_data.get('delivery_contact_name'),
-                delivery_contact_phone=order_data.get('delivery_contact_phone'),
-                package_weight=order_data.get('package_weight'),
-                package_dimensions=order_data.get('package_dimensions'),
-                items=order_data.get('items', []),
-                item_count=len(order_data.get('items', [])),
-                temperature_controlled=order_data.get('temperature_controlled', False),
-                temperature_range=order_data.get('temperature_range'),
-                fragile=order_data.get('fragile', False),
-                time_sensitive=order_data.get('time_sensitive', False),
-                special_instructions=order_data.get('special_instructions'),
-                customer_name=order_data.get('customer_name'),
-                customer_phone=order_data.get('customer_phone'),
-                customer_email=order_data.get('customer_email'),
-                scheduled_pickup=datetime.fromisoformat(order_data['scheduled_pickup']) if order_data.get('scheduled_pickup') else None,
-                scheduled_delivery=datetime.fromisoformat(order_data['scheduled_delivery']) if order_data.get('scheduled_delivery') else None,
-                delivery_fee=order_data.get('delivery_fee', 0.0),
-                insurance_value=order_data.get('insurance_value', 0.0),
-                notes=order_data.get('notes'),
-                custom_data=order_data.get('custom_data', order_data.get('metadata', {}))
-            )
+            order = Order(**self._build_order_row(order_data))
             
             db.add(order)
             db.commit()
@@ -402,6 +495,60 @@ class OrderService:
             logger.error(f"Error creating order: {e}")
             raise
     
+    def bulk_create_orders(self, db: Session, orders_data: List[Dict]) -> List[int]:
+        """
+        Create several delivery orders with one multi-row INSERT and a single commit
+        
+        Args:
+            db: Database session
+            orders_data: List of order dictionaries (same format as create_order)
+            
+        Returns:
+            IDs of the created orders
+            
+        Raises:
+            ValueError: If an order is invalid; nothing is inserted and the message names the order
+        """
+        if not orders_data:
+            return []
+        
+        # Map and check every order before the INSERT so a client mistake names the
+        # offending order instead of rolling back the whole batch with a driver error
+        rows = []
+        seen_numbers = set()
+        for idx, order_data in enumerate(orders_data):
+            label = f"Order {idx + 1}"
+            if isinstance(order_data, dict) and order_data.get('order_number'):
+                label += f" ({order_data['order_number']})"
+            try:
+                row = self._build_order_row(order_data)
+            except KeyError as e:
+                raise ValueError(f"{label}: missing or unknown value for {e}")
+            except (TypeError, AttributeError, ValueError) as e:
+                raise ValueError(f"{label}: invalid data ({e})")
+            if row['order_number'] in seen_numbers:
+                raise ValueError(f"{label}: duplicate order_number in request")
+            seen_numbers.add(row['order_number'])
+            rows.append(row)
+        
+        existing = db.execute(
+            select(Order.order_number).where(Order.order_number.in_(seen_numbers))
+        ).scalars().first()
+        if existing:
+            raise ValueError(f"Order number {existing} already exists")
+        
+        try:
+            order_ids = db.execute(insert(Order).returning(Order.id), rows).scalars().all()
+            db.commit()
+            
+            logger.info(f"Created {len(order_ids)} orders in one batch")
+            return order_ids
+            
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error creating orders: {e}")
+            raise
+    
     def get_order(self, db: Session, order_id: int) -> Optional[Order]:
         """Get order by ID"""
         return db.query(Order).filter(Order.id == order_id).first()
@@ -2,7 +2,6 @@
 Route optimization service using graph algorithms
 Provides TSP (Traveling Salesman Problem) and delivery route optimization
 """
-import networkx as nx
 import numpy as np
 from typing import List, Tuple, Dict, Optional
 from math import radians, cos, sin, asin, sqrt, ceil
@@ -10,6 +9,116 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Numba (optional): compiled haversine, nearest-neighbour tour and 2-opt
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Radius of earth in meters
+EARTH_RADIUS_M = 6371000.0
+
+# Smallest path gain (meters) the 2-opt pass acts on
+TWO_OPT_EPSILON_M = 0.1
+
+# A last waypoint closer than this (meters) to home counts as already home
+HOME_RADIUS_M = 10.0
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _haversine_m(lat1, lon1, lat2, lon2):
+        """Compiled RouteOptimizer.haversine_distance (decimal degrees in, meters out)"""
+        lat1 = np.radians(lat1)
+        lat2 = np.radians(lat2)
+        dlat = lat2 - lat1
+        dlon = np.radians(lon2 - lon1)
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(min(a, 1.0)))
+    
+    @njit(cache=True, fastmath=True)
+    def _pairwise_haversine(lats, lngs):
+        """Symmetric distance matrix (meters) for waypoints given as float64 radians"""
+        n = lats.shape[0]
+        cos_lats = np.cos(lats)
+        distances = np.zeros((n, n), np.float64)
+        for i in range(n):
+            for j in range(i + 1, n):
+                dlat = lats[j] - lats[i]
+                dlon = lngs[j] - lngs[i]
+                a = np.sin(dlat / 2) ** 2 + cos_lats[i] * cos_lats[j] * np.sin(dlon / 2) ** 2
+                d = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(min(a, 1.0)))
+                distances[i, j] = d
+                distances[j, i] = d
+        return distances
+    
+    @njit(cache=True, fastmath=True)
+    def _nn_tsp(distances, start_index):
+        """Nearest Neighbor tour over a distance matrix, returns the int64 visiting order"""
+        n = distances.shape[0]
+        visited = np.zeros(n, np.bool_)
+        order = np.empty(n, np.int64)
+        
+        current = start_index
+        visited[current] = True
+        order[0] = current
+        
+        for k in range(1, n):
+            nearest = -1
+            best_distance = np.inf
+            for j in range(n):
+                if not visited[j] and distances[current, j] < best_distance:
+                    best_distance = distances[current, j]
+                    nearest = j
+            
+            visited[nearest] = True
+            order[k] = nearest
+            current = nearest
+        
+        return order
+    
+    @njit(cache=True, fastmath=True)
+    def _two_opt(order, distances):
+        """
+        2-opt improvement of an open tour (first waypoint stays first), in place
+        Reverses order[i+1..j] whenever that shortens the path by more than
+        TWO_OPT_EPSILON_M; at most n*n reversals. Returns total distance in meters
+        """
+        n = order.shape[0]
+        max_moves = n * n
+        moves = 0
+        improved = True
+        while improved and moves < max_moves:
+            improved = False
+            for i in range(n - 2):
+                a = order[i]
+                b = order[i + 1]
+                for j in range(i + 2, n):
+                    c = order[j]
+                    # Replace edges (a,b) and (c,d) by (a,c) and (b,d); the last
+                    # waypoint has no outgoing edge
+                    delta = distances[a, c] - distances[a, b]
+                    if j + 1 < n:
+                        d = order[j + 1]
+                        delta += distances[b, d] - distances[c, d]
+                    if delta < -TWO_OPT_EPSILON_M:
+                        lo = i + 1
+                        hi = j
+                        while lo < hi:
+                            tmp = order[lo]
+                            order[lo] = order[hi]
+                            order[hi] = tmp
+                            lo += 1
+                            hi -= 1
+                        b = order[i + 1]
+                        moves += 1
+                        improved = True
+        
+        total_distance = 0.0
+        for k in range(n - 1):
+            total_distance += distances[order[k], order[k + 1]]
+        return total_distance
+
 class RouteOptimizer:
     """
     Route optimization using various algorithms:
@@ -18,6 +127,14 @@ class RouteOptimizer:
     - Haversine distance for geographic calculations
     """
     
+    # Priority mapping (order priority -> weight used by calculate_cost)
+    PRIORITY_WEIGHTS = {
+        'low': 1.0,
+        'medium': 2.0,
+        'high': 3.0,
+        'critical': 4.0
+    }
+    
     @staticmethod
     def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
@@ -30,6 +147,9 @@ class RouteOptimizer:
         Returns:
             Distance in meters
         """
+        if NUMBA_AVAILABLE:
+            return _haversine_m(lat1, lon1, lat2, lon2)
+        
         # Convert decimal degrees to radians
         lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
         
@@ -39,10 +159,7 @@ class RouteOptimizer:
         a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
         c = 2 * asin(sqrt(a))
         
-        # Radius of earth in meters
-        r = 6371000
-        
-        return c * r
+        return c * EARTH_RADIUS_M
     
     @staticmethod
     def calculate_cost(distance: float, time: float, priority: float = 1.0) -> float:
@@ -90,40 +207,26 @@ class RouteOptimizer:
         try:
             n = len(waypoints)
             
-            # Create distance matrix
-            distances = np.zeros((n, n))
-            for i in range(n):
-                for j in range(n):
-                    if i != j:
-                        distances[i][j] = self.haversine_distance(
-                            waypoints[i]['latitude'], waypoints[i]['longitude'],
-                            waypoints[j]['latitude'], waypoints[j]['longitude']
-                        )
+            lats = np.radians(np.fromiter((wp['latitude'] for wp in waypoints), np.float64, n))
+            lngs = np.radians(np.fromiter((wp['longitude'] for wp in waypoints), np.float64, n))
             
-            # Nearest neighbor algorithm
-            unvisited = set(range(n))
-            current = start_index
-            route = [current]
-            unvisited.remove(current)
-            
-            while unvisited:
-                # Find nearest unvisited waypoint
-                nearest = min(unvisited, key=lambda x: distances[current][x])
-                route.append(nearest)
-                unvisited.remove(nearest)
-                current = nearest
+            if NUMBA_AVAILABLE:
+                distances = _pairwise_haversine(lats, lngs)
+                order = _nn_tsp(distances, start_index)
+                # Nearest Neighbor leaves crossing legs; untangle them with 2-opt
+                total_distance = _two_opt(order, distances)
+                route = order.tolist()
+            else:
+                distances = self._distance_matrix(lats, lngs)
+                order = self._nearest_neighbor_route(distances, start_index)
+                total_distance = self._two_opt_route(order, distances)
+                route = order.tolist()
             
             # Reorder waypoints and update sequences
             optimized = [waypoints[i] for i in route]
             for idx, wp in enumerate(optimized):
                 wp['sequence'] = idx + 1
             
-            # Calculate total distance
-            total_distance = sum(
-                distances[route[i]][route[i+1]] 
-                for i in range(len(route)-1)
-            )
-            
             logger.info(f"TSP optimization: {n} waypoints, total distance: {total_distance/1000:.2f}km")
             return optimized
             
@@ -134,6 +237,88 @@ class RouteOptimizer:
                 wp['sequence'] = idx + 1
             return waypoints
     
+    @staticmethod
+    def _distance_matrix(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """
+        Haversine distance (meters) between every pair of points, by broadcasting
+        
+        Args:
+            lats, lngs: Coordinates in radians
+            
+        Returns:
+            (n, n) float64 matrix
+        """
+        dlat = lats[:, None] - lats[None, :]
+        dlon = lngs[:, None] - lngs[None, :]
+        cos_lats = np.cos(lats)
+        a = np.sin(dlat / 2) ** 2 + cos_lats[:, None] * cos_lats[None, :] * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    @staticmethod
+    def _nearest_neighbor_route(distances: np.ndarray, start_index: int) -> np.ndarray:
+        """
+        Nearest Neighbor tour with NumPy (used when numba is not installed)
+        
+        Args:
+            distances: (n, n) distance matrix from _distance_matrix
+            start_index: Index of starting waypoint
+            
+        Returns:
+            Visiting order as an int64 array of waypoint indices
+        """
+        n = distances.shape[0]
+        
+        # Nearest neighbor algorithm
+        unvisited = np.ones(n, dtype=bool)
+        unvisited[start_index] = False
+        current = start_index
+        route = np.empty(n, dtype=np.int64)
+        route[0] = current
+        
+        for k in range(1, n):
+            # Find nearest unvisited waypoint (one masked argmin per step)
+            nearest = int(np.argmin(np.where(unvisited, distances[current], np.inf)))
+            route[k] = nearest
+            unvisited[nearest] = False
+            current = nearest
+        
+        return route
+    
+    @staticmethod
+    def _two_opt_route(order: np.ndarray, distances: np.ndarray) -> float:
+        """
+        NumPy version of the compiled _two_opt: improves the open tour in place
+        (first waypoint stays first), evaluating all segment ends j for a given i at once
+        
+        Returns:
+            Total distance in meters
+        """
+        n = len(order)
+        max_moves = n * n
+        moves = 0
+        improved = True
+        while improved and moves < max_moves:
+            improved = False
+            for i in range(n - 2):
+                j = i + 2
+                while j < n:
+                    a, b = order[i], order[i + 1]
+                    c = order[j:]
+                    # Gain of replacing edges (a,b) and (c,d) by (a,c) and (b,d) for every j;
+                    # the last waypoint has no outgoing edge
+                    delta = distances[a, c] - distances[a, b]
+                    delta[:-1] += distances[b, c[1:]] - distances[c[:-1], c[1:]]
+                    hits = np.flatnonzero(delta < -TWO_OPT_EPSILON_M)
+                    if hits.size == 0:
+                        break
+                    j += int(hits[0])
+                    order[i + 1:j + 1] = order[i + 1:j + 1][::-1].copy()
+                    moves += 1
+                    improved = True
+                    j += 1
+        
+        return float(distances[order[:-1], order[1:]].sum())
+    
     def optimize_delivery_route(
         self, 
         orders: List[Dict], 
@@ -156,122 +341,41 @@ class RouteOptimizer:
             return [], []
         
         try:
-            # Create graph
-            G = nx.DiGraph()
+            n = len(orders)
             
-            # Add start node
-            G.add_node('start', 
-                      lat=start_point['latitude'], 
-                      lng=start_point['longitude'],
-                      type='start')
-            
-            # Priority mapping
-            priority_values = {
-                'low': 1.0,
-                'medium': 2.0,
-                'high': 3.0,
-                'critical': 4.0
-            }
-            
-            # Add pickup and delivery nodes for each order
-            for idx, order in enumerate(orders):
-                pickup_id = f"pickup_{idx}"
-                delivery_id = f"delivery_{idx}"
-                
-                priority = priority_values.get(order.get('priority', 'medium'), 2.0)
-                
-                G.add_node(pickup_id,
-                          lat=order['pickup_latitude'],
-                          lng=order['pickup_longitude'],
-                          order_id=order.get('id'),
-                          order_index=idx,
-                          type='pickup',
-                          priority=priority)
-                
-                G.add_node(delivery_id,
-                          lat=order['delivery_latitude'],
-                          lng=order['delivery_longitude'],
-                          order_id=order.get('id'),
-                          order_index=idx,
-                          type='delivery',
-                          priority=priority)
-                
-                # Mandatory edge: must pickup before delivery
-                distance = self.haversine_distance(
-                    order['pickup_latitude'], order['pickup_longitude'],
-                    order['delivery_latitude'], order['delivery_longitude']
-                )
-                G.add_edge(pickup_id, delivery_id, weight=distance, mandatory=True)
-            
-            # Build route using greedy algorithm
-            current = 'start'
-            route = [current]
-            visited_orders = set()
-            
-            while len(visited_orders) < len(orders):
-                candidates = []
-                
-                # Find best next waypoint
-                for idx in range(len(orders)):
-                    if idx not in visited_orders:
-                        pickup_id = f"pickup_{idx}"
-                        
-                        # Can only go to pickup if not yet visited
-                        if pickup_id not in route:
-                            node_data = G.nodes[pickup_id]
-                            current_data = G.nodes[current]
-                            
-                            distance = self.haversine_distance(
-                                current_data['lat'], current_data['lng'],
-                                node_data['lat'], node_data['lng']
-                            )
-                            
-                            flight_time = distance / 5.0  # Assume 5 m/s speed
-                            priority = node_data['priority'] if consider_priority else 1.0
-                            
-                            cost = self.calculate_cost(distance, flight_time, priority)
-                            candidates.append((pickup_id, cost, idx))
-                
-                if candidates:
-                    # Choose candidate with lowest cost
-                    next_node, _, order_idx = min(candidates, key=lambda x: x[1])
-                    route.append(next_node)
-                    
-                    # Immediately add corresponding delivery
-                    delivery_id = f"delivery_{order_idx}"
-                    route.append(delivery_id)
-                    visited_orders.add(order_idx)
-                    current = delivery_id
-                else:
-                    break
+            # Per-order coordinate/priority arrays instead of a graph of attribute dicts
+            order_sequence = self.optimize_delivery_route_arrays(
+                np.fromiter((order['pickup_latitude'] for order in orders), np.float64, n),
+                np.fromiter((order['pickup_longitude'] for order in orders), np.float64, n),
+                np.fromiter((order['delivery_latitude'] for order in orders), np.float64, n),
+                np.fromiter((order['delivery_longitude'] for order in orders), np.float64, n),
+                np.fromiter(
+                    (self.PRIORITY_WEIGHTS.get(order.get('priority', 'medium'), 2.0) for order in orders),
+                    np.float64, n
+                ),
+                start_point['latitude'],
+                start_point['longitude'],
+                consider_priority=consider_priority
+            )
             
-            # Convert route to waypoints
+            # Convert route to waypoints (pickup, then delivery of the same order)
             waypoints = []
-            sequence = 1
+            for order_idx in order_sequence.tolist():
+                order = orders[order_idx]
+                for waypoint_type in ('pickup', 'delivery'):
+                    waypoints.append({
+                        'sequence': len(waypoints) + 1,
+                        'latitude': order[f'{waypoint_type}_latitude'],
+                        'longitude': order[f'{waypoint_type}_longitude'],
+                        'waypoint_type': waypoint_type,
+                        'action': waypoint_type,
+                        'action_params': {
+                            'order_id': order.get('id'),
+                            'order_index': order_idx
+                        },
+                        'name': f"{waypoint_type.title()} - Order #{order.get('order_number', order_idx+1)}"
+                    })
             
-            for node in route:
-                if node == 'start':
-                    continue
-                
-                node_data = G.nodes[node]
-                order_idx = node_data.get('order_index')
-                
-                waypoint = {
-                    'sequence': sequence,
-                    'latitude': node_data['lat'],
-                    'longitude': node_data['lng'],
-                    'waypoint_type': node_data['type'],
-                    'action': 'pickup' if node_data['type'] == 'pickup' else 'delivery',
-                    'action_params': {
-                        'order_id': node_data.get('order_id'),
-                        'order_index': order_idx
-                    },
-                    'name': f"{node_data['type'].title()} - Order #{orders[order_idx].get('order_number', order_idx+1)}" if order_idx is not None else None
-                }
-                waypoints.append(waypoint)
-                sequence += 1
-            
-            logger.info(f"Delivery route optimized: {len(orders)} orders, {len(waypoints)} waypoints")
             return orders, waypoints
             
         except Exception as e:
@@ -302,6 +406,72 @@ class RouteOptimizer:
                 ])
             return orders, waypoints
     
+    def optimize_delivery_route_arrays(
+        self,
+        pickup_lat: np.ndarray,
+        pickup_lng: np.ndarray,
+        delivery_lat: np.ndarray,
+        delivery_lng: np.ndarray,
+        priority: np.ndarray,
+        start_lat: float,
+        start_lng: float,
+        consider_priority: bool = True
+    ) -> np.ndarray:
+        """
+        Greedy delivery ordering over per-order coordinate arrays (one entry per order)
+        Same cost model as optimize_delivery_route: from the current position go to the
+        cheapest unvisited pickup (calculate_cost), then straight to its delivery
+        
+        Args:
+            pickup_lat, pickup_lng: Pickup coordinates (decimal degrees)
+            delivery_lat, delivery_lng: Delivery coordinates (decimal degrees)
+            priority: Priority weights (see PRIORITY_WEIGHTS)
+            start_lat, start_lng: Starting location
+            consider_priority: Whether to factor in order priority
+            
+        Returns:
+            Order indices in visiting order (each order = pickup then delivery)
+        """
+        n = len(pickup_lat)
+        pickup_lat = np.radians(np.asarray(pickup_lat, dtype=np.float64))
+        pickup_lng = np.radians(np.asarray(pickup_lng, dtype=np.float64))
+        
+        # The drone only ever leaves from the start or from a delivery, so row 0 is the
+        # start and row i + 1 is delivery i
+        origin_lat = np.radians(np.concatenate(([start_lat], np.asarray(delivery_lat, dtype=np.float64))))
+        origin_lng = np.radians(np.concatenate(([start_lng], np.asarray(delivery_lng, dtype=np.float64))))
+        
+        # Priority term of calculate_cost is fixed per order
+        if consider_priority:
+            priority = np.asarray(priority, dtype=np.float64)
+            priority_factor = np.ones(n)
+            np.divide(1.0, priority, out=priority_factor, where=priority > 0)
+        else:
+            priority_factor = np.ones(n)
+        priority_cost = priority_factor * 0.1 * 1000
+        
+        # Haversine distance from every origin to every pickup, computed once
+        dlat = pickup_lat[None, :] - origin_lat[:, None]
+        dlon = pickup_lng[None, :] - origin_lng[:, None]
+        a = np.sin(dlat / 2) ** 2 + np.cos(origin_lat)[:, None] * np.cos(pickup_lat)[None, :] * np.sin(dlon / 2) ** 2
+        distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        
+        flight_time = distance / 5.0  # Assume 5 m/s speed
+        cost = distance * 0.6 + flight_time * 0.3 + priority_cost[None, :]
+        
+        sequence = np.empty(n, dtype=np.int64)
+        row = 0
+        for k in range(n):
+            order_idx = int(np.argmin(cost[row]))
+            sequence[k] = order_idx
+            cost[:, order_idx] = np.inf
+            
+            # Immediately fly to the corresponding delivery
+            row = order_idx + 1
+        
+        logger.info(f"Delivery route optimized: {n} orders, {2 * n} waypoints")
+        return sequence
+    
     def calculate_route_statistics(
         self, 
         waypoints: List[Dict], 
@@ -328,20 +498,19 @@ class RouteOptimizer:
                 'battery_required': 0.0
             }
         
-        total_distance = 0.0
-        total_hover_time = 0.0
+        n = len(waypoints)
+        lats = np.radians(np.fromiter((wp['latitude'] for wp in waypoints), np.float64, n))
+        lngs = np.radians(np.fromiter((wp['longitude'] for wp in waypoints), np.float64, n))
         
-        # Calculate distances between consecutive waypoints
-        for i in range(len(waypoints) - 1):
-            distance = self.haversine_distance(
-                waypoints[i]['latitude'], waypoints[i]['longitude'],
-                waypoints[i + 1]['latitude'], waypoints[i + 1]['longitude']
-            )
-            total_distance += distance
-            
-            # Add hover time if specified
-            hover_time = waypoints[i].get('hover_time', 0.0)
-            total_hover_time += hover_time
+        # Haversine distances between consecutive waypoints, all legs at once
+        dlat = np.diff(lats)
+        dlon = np.diff(lngs)
+        cos_lats = np.cos(lats)
+        a = np.sin(dlat / 2) ** 2 + cos_lats[:-1] * cos_lats[1:] * np.sin(dlon / 2) ** 2
+        total_distance = float(np.sum(2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))))
+        
+        # Add hover time if specified (the final waypoint ends the route)
+        total_hover_time = sum(wp.get('hover_time', 0.0) for wp in waypoints[:-1])
         
         # Calculate flight time
         flight_time = total_distance / flight_speed  # seconds
@@ -379,8 +548,10 @@ class RouteOptimizer:
         
         # Check if last waypoint is already home
         last_wp = waypoints[-1]
-        if (abs(last_wp['latitude'] - home_point['latitude']) < 0.0001 and
-            abs(last_wp['longitude'] - home_point['longitude']) < 0.0001):
+        if self.haversine_distance(
+            last_wp['latitude'], last_wp['longitude'],
+            home_point['latitude'], home_point['longitude']
+        ) < HOME_RADIUS_M:
             return waypoints
         
         # Add RTH waypoint
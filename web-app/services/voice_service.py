@@ -6,10 +6,38 @@ from model.voice_model import VoiceRecord
 from datetime import datetime, timezone, timedelta
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import threading
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive connection pool to the AI service, shared by all background triggers
+# (a plain requests.post() pays a new TCP + TLS handshake for every record).
+# Only connection failures and gateway errors are retried, so a job the AI service
+# already accepted is never queued twice.
+_ai_retry = Retry(
+    total=2,
+    connect=2,
+    read=0,
+    backoff_factor=0.2,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({'POST'}),
+    raise_on_status=False
+)
+_ai_session = requests.Session()
+_ai_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_ai_retry))
+_ai_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_ai_retry))
+
+
+def _analysis_priority(intent: str):
+    """Priority columns derived from the AI intent"""
+    if intent in ['Cứu Gấp', 'Bị thương']:
+        return {'priority': 'critical', 'is_urgent': True}
+    elif intent == 'Đói/Khát':
+        return {'priority': 'high'}
+    return {'priority': 'medium'}
+
 # Note: Using simple daemon threads instead of ThreadPoolExecutor
 # to avoid blocking gevent event loop in Flask-SocketIO
 
@@ -84,13 +112,8 @@ class VoiceRecordService:
                 record.analyzed_at = datetime.now(timezone.utc)
                 
                 # Auto-set priority based on intent
-                if intent in ['Cứu Gấp', 'Bị thương']:
-                    record.priority = 'critical'
-                    record.is_urgent = True
-                elif intent == 'Đói/Khát':
-                    record.priority = 'high'
-                else:
-                    record.priority = 'medium'
+                for key, value in _analysis_priority(intent).items():
+                    setattr(record, key, value)
                 
                 self.db.commit()
                 
@@ -107,6 +130,43 @@ class VoiceRecordService:
             logger.error(f"[VOICE SERVICE] Error updating analysis: {str(e)}")
             raise
     
+    def bulk_update_analysis(self, updates: list):
+        """
+        Update AI analysis results for many records in one round-trip and one commit
+        
+        Args:
+            updates: List of dicts with 'id', 'intent', 'items' and optional 'error'
+                     (same meaning as the update_analysis arguments)
+        
+        Returns:
+            Number of records updated
+        """
+        try:
+            analyzed_at = datetime.now(timezone.utc)
+            mappings = []
+            for update in updates:
+                error = update.get('error')
+                mapping = {
+                    'id': update['id'],
+                    'analysis_intent': update.get('intent'),
+                    'analysis_items': update.get('items', []),
+                    'analysis_status': 'completed' if not error else 'failed',
+                    'analysis_error': error,
+                    'analyzed_at': analyzed_at
+                }
+                mapping.update(_analysis_priority(update.get('intent')))
+                mappings.append(mapping)
+            
+            if mappings:
+                self.db.bulk_update_mappings(VoiceRecord, mappings)
+                self.db.commit()
+            logger.info(f"[VOICE SERVICE] Bulk updated analysis for {len(mappings)} record(s)")
+            return len(mappings)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"[VOICE SERVICE] Error bulk updating analysis: {str(e)}")
+            raise
+    
     def get_record(self, record_id: int):
         """Get a single voice record"""
         try:
@@ -254,7 +314,7 @@ class VoiceRecordService:
                     
                     # Short timeout (5s): AI service just needs to acknowledge and queue the job
                     # AI service will do transcription + analysis in background, then callback when done
-                    response = requests.post(ai_service_url, json=payload, timeout=5)
+                    response = _ai_session.post(ai_service_url, json=payload, timeout=5)
                     
                     if response.status_code == 200:
                         logger.info(f"[VOICE SERVICE BG] AI analysis triggered successfully for record {record_id}")
@@ -10,6 +10,7 @@ let currentMission = null;
 let allMissions = [];
 let activeMissionMarkers = [];
 let tempOrders = []; // Temporary orders for mission creation
+let pendingOrdersMission = null; // Mission already created whose orders failed to save (retry target)
 
 // Initialize Mission Management
 document.addEventListener('DOMContentLoaded', function() {
@@ -1411,6 +1412,14 @@ function setupModalOrdersToggle() {
         });
     }
     
+    // A retry target only lives as long as the modal it failed in
+    const missionModal = document.getElementById('newMissionModal');
+    if (missionModal) {
+        missionModal.addEventListener('hidden.bs.modal', function() {
+            pendingOrdersMission = null;
+        });
+    }
+    
     // Setup pickup location toggle for quick order
     const quickPickupSelect = document.getElementById('quickPickupLocation');
     if (quickPickupSelect) {
@@ -1672,43 +1681,56 @@ async function createMissionWithOrders() {
     }
     
     try {
-        // Create mission first
-        const response = await fetch('/api/missions', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(missionData)
-        });
-        
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.message || 'Failed to create mission');
+        // Create mission first (unless a previous attempt created it but its orders failed)
+        let newMission = pendingOrdersMission;
+        if (!newMission) {
+            const response = await fetch('/api/missions', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify(missionData)
+            });
+            
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.message || 'Failed to create mission');
+            }
+            
+            const result = await response.json();
+            newMission = result.mission;
         }
         
-        const result = await response.json();
-        const newMission = result.mission;
-        
-        // Create orders if any
+        // Create orders if any (one request, one transaction)
         if (tempOrders.length > 0) {
             for (const order of tempOrders) {
                 order.mission_id = newMission.id;
                 order.order_number = 'ORD-' + Date.now() + '-' + Math.random().toString(36).substr(2, 5);
-                
-                await fetch('/api/orders', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(order)
-                });
             }
-            showToast(`Mission created with ${tempOrders.length} order(s)`, 'success');
+            
+            const ordersResponse = await fetch('/api/orders/bulk', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ orders: tempOrders })
+            });
+            const ordersResult = await ordersResponse.json().catch(() => ({}));
+            
+            if (!ordersResponse.ok || ordersResult.status !== 'success') {
+                // The whole batch was rolled back: keep the orders so the user can fix and retry
+                pendingOrdersMission = newMission;
+                await loadMissions();
+                showToast(`Mission "${newMission.name}" created, but no orders were saved: ${ordersResult.message || 'Failed to create orders'}`, 'error');
+                return;
+            }
+            showToast(`Mission created with ${ordersResult.order_ids.length} order(s)`, 'success');
         } else {
             showToast('Mission created successfully', 'success');
         }
         
         // Clear temp orders
+        pendingOrdersMission = null;
         tempOrders = [];
         updateQuickOrdersList();
         